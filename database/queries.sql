@@ -6,17 +6,17 @@ SELECT
     c.customer_name,
     c.mobile_number,
     c.region,
-    COUNT(DISTINCT o.order_id) AS order_count
+    COUNT(*) AS order_count
 FROM customers c
 INNER JOIN orders o ON c.mobile_number = o.mobile_number
 GROUP BY c.customer_id, c.customer_name, c.mobile_number, c.region
 HAVING order_count > 1
 ORDER BY order_count DESC, c.mobile_number;
 
--- 2. Monthly Order Trends
+-- 2. Monthly Order Trends (order_month is a stored generated column)
 SELECT 
-    DATE_FORMAT(order_date_time, '%Y-%m-01') AS order_month,
-    COUNT(DISTINCT order_id) AS order_count
+    order_month,
+    COUNT(*) AS order_count
 FROM orders
 GROUP BY order_month
 ORDER BY order_month;
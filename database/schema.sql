@@ -2,6 +2,7 @@
 -- Creates tables for customers and orders
 
 -- Drop tables if they exist
+DROP TABLE IF EXISTS load_metadata;
 DROP TABLE IF EXISTS orders;
 DROP TABLE IF EXISTS customers;
 
@@ -12,8 +13,9 @@ CREATE TABLE customers (
     mobile_number VARCHAR(20) NOT NULL,
     region VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_mobile (mobile_number),
-    INDEX idx_region (region)
+    INDEX idx_region (region),
+    -- Covers the mobile_number join plus every selected customer column
+    INDEX idx_mobile_customer (mobile_number, customer_id, customer_name, region)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Orders table
@@ -23,8 +25,19 @@ CREATE TABLE orders (
     sku_count INT DEFAULT 0,
     total_amount DECIMAL(10, 2) DEFAULT 0.00,
     order_date_time DATETIME NOT NULL,
+    -- Stored month key so monthly trends group on an indexed column
+    order_month DATE AS (DATE_SUB(DATE(order_date_time), INTERVAL DAYOFMONTH(order_date_time) - 1 DAY)) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    INDEX idx_mobile (mobile_number),
-    INDEX idx_order_date (order_date_time),
+    -- Covering indexes for the KPI queries (see src/db_approach/query_benchmark.py)
+    INDEX idx_mobile_date_amount (mobile_number, order_date_time, total_amount),
+    INDEX idx_date_mobile_amount (order_date_time, mobile_number, total_amount),
+    INDEX idx_month_order (order_month, order_id),
     INDEX idx_amount (total_amount)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Input version loaded into each table (written by the loaders after commit)
+CREATE TABLE load_metadata (
+    table_name VARCHAR(64) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
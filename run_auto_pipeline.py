@@ -0,0 +1,14 @@
+"""
+Automatic Pipeline Runner
+Chooses between the in-memory and database approaches per run
+"""
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from auto_approach.main import main
+
+if __name__ == "__main__":
+    main()
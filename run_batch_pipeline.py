@@ -0,0 +1,15 @@
+"""
+Batch Pipeline Runner
+Processes a directory or glob of order XML drops with a single customer load
+Usage: py run_batch_pipeline.py "data/raw/orders/*.xml" [--workers 4]
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'src'))
+
+from inmemory_approach.batch import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+KPI Backend Benchmark Runner
+Compares the pandas and NumPy-kernel KPI backends at 1M-50M orders
+"""
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from inmemory_approach.kpi_benchmark import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+"""
+KPI History Runner
+Queries and compacts the KPI snapshot store
+"""
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from kpi_history import main
+
+if __name__ == "__main__":
+    main()
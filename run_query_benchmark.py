@@ -0,0 +1,14 @@
+"""
+Query Benchmark Runner
+Captures KPI query plans and timings and checks them against the baseline
+"""
+import sys
+import os
+
+# Add src directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from db_approach.query_benchmark import main
+
+if __name__ == "__main__":
+    main()
@@ -7,10 +7,15 @@ from datetime import datetime
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from inmemory_approach.main import main
+from utils.config import LOGS_DIR
 from utils.logger import setup_logger
 
-logger = setup_logger(__name__)
+# Long-running process: queue log writes to a background thread and rotate the file.
+# The pipeline logs to 'akasa' and only configures it if nobody has, so this has to
+# run before the pipeline is imported for its lines to reach scheduler.log too.
+logger = setup_logger('akasa', log_file=LOGS_DIR / 'scheduler.log', async_mode=True)
+
+from inmemory_approach.main import main  # noqa: E402
 
 def job():
     """Execute the pipeline and handle errors"""
@@ -0,0 +1 @@
+# Automatic engine selection package
@@ -0,0 +1,144 @@
+"""
+Engine Cost Model
+Estimates the run time of the in-memory and database engines from input
+size, available memory and warm state, and learns its coefficients from
+observed stage timings
+"""
+import json
+import logging
+import math
+import os
+from pathlib import Path
+
+log = logging.getLogger('akasa')
+
+ENGINES = ('inmemory', 'db')
+
+# Each engine costs overhead_s + (load_s_per_mb + kpi_s_per_mb) * input_mb.
+# memory_factor is the in-memory peak footprint as a multiple of input size.
+DEFAULT_COSTS = {
+    'inmemory': {'overhead_s': 0.5, 'load_s_per_mb': 0.5, 'kpi_s_per_mb': 0.05, 'memory_factor': 8.0},
+    'db': {'overhead_s': 2.0, 'load_s_per_mb': 20.0, 'kpi_s_per_mb': 0.02},
+}
+
+# Fraction of available memory the in-memory engine may plan to use
+MEMORY_HEADROOM = 0.8
+
+# Weight of each new observation in the exponential moving averages
+LEARNING_RATE = 0.3
+
+# Below this input size timings mostly measure fixed overhead
+MIN_RATE_SAMPLE_MB = 1.0
+
+
+def available_memory_bytes():
+    """Best-effort available physical memory in bytes, or None if unknown"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+class CostModel:
+    """Per-engine cost coefficients persisted as JSON between runs"""
+
+    def __init__(self, path=None, costs=None, state=None):
+        self.path = Path(path) if path else None
+        self.costs = costs or json.loads(json.dumps(DEFAULT_COSTS))
+        self.state = state or {}
+
+    @classmethod
+    def load(cls, path) -> 'CostModel':
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        data = json.loads(path.read_text())
+        costs = json.loads(json.dumps(DEFAULT_COSTS))
+        for engine, coefficients in data.get('costs', {}).items():
+            costs.setdefault(engine, {}).update(coefficients)
+        return cls(path, costs, data.get('state', {}))
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps({'costs': self.costs, 'state': self.state}, indent=2))
+
+    def estimate(self, engine, input_mb, available_mb=None, warm=False):
+        """
+        Estimate seconds for one engine
+
+        Returns:
+            (seconds, reason) where seconds is math.inf if the engine cannot run
+        """
+        c = self.costs[engine]
+        if engine == 'inmemory':
+            needed_mb = c['memory_factor'] * input_mb
+            if available_mb is not None and needed_mb > MEMORY_HEADROOM * available_mb:
+                return math.inf, (
+                    f"needs ~{needed_mb:.0f} MB but only {available_mb:.0f} MB available"
+                )
+        load = 0.0 if warm else c['load_s_per_mb'] * input_mb
+        seconds = c['overhead_s'] + load + c['kpi_s_per_mb'] * input_mb
+        label = 'cached' if engine == 'inmemory' else 'warm'
+        reason = f"{seconds:.2f}s estimated ({label} data, load skipped)" if warm else f"{seconds:.2f}s estimated"
+        return seconds, reason
+
+    def choose(self, input_mb, available_mb=None, warm=None, available=None):
+        """
+        Pick the cheaper engine
+
+        Args:
+            input_mb: Input size in MB
+            available_mb: Available memory in MB (None if unknown)
+            warm: {engine: bool} whether data is already loaded/cached
+            available: {engine: bool} whether the engine can run at all
+
+        Returns:
+            (engine, {engine: (seconds, reason)})
+        """
+        warm = warm or {}
+        available = available or {}
+        estimates = {}
+        for engine in ENGINES:
+            if not available.get(engine, True):
+                estimates[engine] = (math.inf, 'unavailable')
+            else:
+                estimates[engine] = self.estimate(engine, input_mb, available_mb, warm.get(engine, False))
+        engine = min(ENGINES, key=lambda e: estimates[e][0])
+        if math.isinf(estimates[engine][0]):
+            # Nothing fits the model; fall back to the engine that can at least start
+            engine = 'db' if available.get('db', True) else 'inmemory'
+        return engine, estimates
+
+    def observe(self, engine, input_mb, timings, warm=False):
+        """
+        Fold measured stage timings back into the coefficients
+
+        Args:
+            timings: {'load': s, 'kpis': s} plus optional 'overhead': s;
+                'load' is not learned from when the run was warm
+        """
+        c = self.costs[engine]
+
+        def blend(key, value):
+            c[key] = (1 - LEARNING_RATE) * c[key] + LEARNING_RATE * max(value, 0.0)
+
+        if 'overhead' in timings:
+            blend('overhead_s', timings['overhead'])
+        elif input_mb < MIN_RATE_SAMPLE_MB:
+            # Tiny inputs: the whole run is effectively fixed overhead
+            blend('overhead_s', sum(timings.values()))
+        if input_mb >= MIN_RATE_SAMPLE_MB:
+            if not warm and 'load' in timings:
+                blend('load_s_per_mb', timings['load'] / input_mb)
+            if 'kpis' in timings:
+                blend('kpi_s_per_mb', timings['kpis'] / input_mb)
+        log.info(f"Updated {engine} cost model: " + ", ".join(f"{k}={v:.4g}" for k, v in c.items()))
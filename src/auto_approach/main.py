@@ -0,0 +1,132 @@
+"""
+Automatic Engine Selection - Main Pipeline
+Estimates the cost of the in-memory and database approaches for this run,
+executes the cheaper one, and feeds the measured timings back into the
+cost model
+"""
+import math
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.config import CONFIG
+from utils.logger import setup_logger
+from utils.dag import StageError
+from utils.streams import uncompressed_size
+from auto_approach.cost_model import CostModel, available_memory_bytes
+from inmemory_approach import main as inmemory_main
+
+logger = setup_logger('akasa')
+
+MB = 1024 * 1024
+
+
+def probe_db():
+    """
+    Check whether the database engine can run and already holds this data
+
+    The loaders record the version of the inputs they loaded in the
+    database itself, so loads by other tools are seen too.
+
+    Returns:
+        (reachable, warm)
+    """
+    try:
+        from db_approach.load_data import get_connection, loaded_fingerprints, load_fingerprint
+        conn = get_connection()
+    except Exception as e:
+        logger.info(f"Database engine unavailable: {e}")
+        return False, False
+
+    try:
+        loaded = loaded_fingerprints(conn)
+        return True, (
+            loaded.get('customers') == load_fingerprint('customers', CONFIG['CUSTOMERS_CSV'])
+            and loaded.get('orders') == load_fingerprint('orders', CONFIG['ORDERS_XML'])
+        )
+    except Exception:
+        return True, False
+    finally:
+        conn.close()
+
+
+def _inmemory_timings(stage_timings: dict, total: float) -> dict:
+    """Split DAG stage timings into load and KPI time along the critical branches"""
+    load = sum(
+        stage_timings.get(name, 0.0)
+        for name in ('load_customers', 'validate_customers', 'validate_orders')
+    )
+    load = max(load, stage_timings.get('load_orders', 0.0) + stage_timings.get('validate_orders', 0.0))
+    return {'load': load, 'kpis': total - load}
+
+
+def main():
+    """Choose an engine, run it and update the cost model"""
+    logger.info("Starting Akasa Air - automatic engine selection")
+
+    model = CostModel.load(CONFIG['ENGINE_COST_MODEL'])
+    # Compressed inputs are costed by their decompressed size
+    input_bytes = sum(
+        uncompressed_size(p) for p in (CONFIG['CUSTOMERS_CSV'], CONFIG['ORDERS_XML']) if Path(p).exists()
+    )
+    input_mb = input_bytes / MB
+    memory = available_memory_bytes()
+    available_mb = memory / MB if memory is not None else None
+
+    dag = inmemory_main.build_pipeline()
+    # Only priced as cached when a resume would really skip loading the inputs
+    _, skipped = dag.plan()
+    cached = {'load_customers', 'load_orders'} <= skipped
+    db_reachable, db_warm = probe_db()
+
+    engine, estimates = model.choose(
+        input_mb, available_mb,
+        warm={'inmemory': cached, 'db': db_warm},
+        available={'db': db_reachable}
+    )
+    memory_note = f"{available_mb:.0f} MB" if available_mb is not None else "unknown"
+    logger.info(f"Input size {input_mb:.2f} MB, available memory {memory_note}")
+    for name, (seconds, reason) in estimates.items():
+        logger.info(f"  {name}: {reason}")
+    if CONFIG['ENGINE'] in ('inmemory', 'db'):
+        engine = CONFIG['ENGINE']
+        logger.info(f"Engine forced to '{engine}' by ENGINE setting")
+    else:
+        logger.info(f"Selected '{engine}' engine (lowest estimated cost)")
+
+    start = time.perf_counter()
+    try:
+        if engine == 'inmemory':
+            outputs = dag.run()
+            total = time.perf_counter() - start
+            timings = _inmemory_timings(dag.timings, total)
+            inmemory_main.display_results(outputs)
+            warm = cached
+        else:
+            from db_approach.main import run_pipeline, save_reports, save_snapshot, display_results
+            kpis, timings = run_pipeline(load=not db_warm)
+            total = time.perf_counter() - start
+            timings['overhead'] = total - timings.get('load', 0.0) - timings['kpis']
+            save_reports(kpis, CONFIG['REPORTS_DIR'])
+            save_snapshot(kpis)
+            display_results(kpis)
+            warm = db_warm
+    except StageError as e:
+        logger.error(f"Pipeline failed: {e}")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Pipeline failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    estimated = estimates[engine][0]
+    estimate_note = f"{estimated:.2f}s" if not math.isinf(estimated) else "n/a"
+    logger.info(f"'{engine}' engine finished in {total:.2f}s (estimated {estimate_note})")
+    model.observe(engine, input_mb, timings, warm=warm)
+    model.save()
+    logger.info("Pipeline completed successfully")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,105 @@
 import pandas as pd
-import xml.etree.ElementTree as ET
 import os
 import sys
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-def load_customers_csv(file_path):
-    """Load customers data from CSV file"""
+from data_profiler import profile_customers_csv, profile_orders_xml, write_profile
+
+def profile_customers(file_path):
+    """Profile customers data from CSV file in a single streaming pass"""
     print("=" * 80)
-    print("LOADING CUSTOMERS DATA (CSV)")
+    print("PROFILING CUSTOMERS DATA (CSV)")
     print("=" * 80)
     
     try:
-        df = pd.read_csv(file_path)
-        print(f"Successfully loaded {len(df)} customer records\n")
-        return df
+        profile = profile_customers_csv(file_path)
+        print(f"Successfully profiled {profile['rows']} customer records\n")
+        return profile
     except Exception as e:
-        print(f"Error loading CSV: {e}")
+        print(f"Error profiling CSV: {e}")
         return None
 
-def load_orders_xml(file_path):
-    """Load orders data from XML file"""
+def profile_orders(file_path):
+    """Profile orders data from XML file in a single streaming pass"""
     print("=" * 80)
-    print("LOADING ORDERS DATA (XML)")
+    print("PROFILING ORDERS DATA (XML)")
     print("=" * 80)
     
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        orders_data = []
-        for order in root.findall('.//order'):
-            order_dict = {}
-            for child in order:
-                order_dict[child.tag] = child.text
-            orders_data.append(order_dict)
-        
-        df = pd.DataFrame(orders_data)
-        print(f"Successfully loaded {len(df)} order records\n")
-        return df
+        profile = profile_orders_xml(file_path)
+        print(f"Successfully profiled {profile['rows']} order records\n")
+        return profile
     except Exception as e:
-        print(f"Error loading XML: {e}")
+        print(f"Error profiling XML: {e}")
         return None
 
-def display_dataset_info(df, dataset_name):
-    """Display comprehensive information about a dataset"""
+def display_dataset_info(profile, dataset_name):
+    """Display comprehensive information about a profiled dataset"""
     print("\n" + "=" * 80)
     print(f"{dataset_name.upper()} - DATASET ANALYSIS")
     print("=" * 80)
     
     # 1. HEAD - First 5 rows
-    print(f"\nHEAD - First 5 rows of {dataset_name}:")
+    print(f"\nHEAD - First {len(profile['head'])} rows of {dataset_name}:")
     print("-" * 80)
-    print(df.head())
+    print(pd.DataFrame(profile['head']))
     
     # 2. MISSING VALUES
     print(f"\nMISSING VALUES in {dataset_name}:")
     print("-" * 80)
-    missing_values = df.isnull().sum()
-    
+    columns = profile['columns']
     missing_df = pd.DataFrame({
-        'Column': missing_values.index,
-        'Missing Count': missing_values.values
+        'Column': list(columns),
+        'Missing Count': [col['nulls'] for col in columns.values()]
     })
     
     print(missing_df.to_string(index=False))
     
-    total_missing = missing_values.sum()
+    total_missing = int(missing_df['Missing Count'].sum())
     if total_missing == 0:
         print(f"\nNo missing values found in {dataset_name}")
     else:
         print(f"\nTotal missing values: {total_missing}")
     
-    # 3. BASIC STATISTICS
+    # 3. COLUMN STATISTICS
+    print(f"\nCOLUMN STATISTICS for {dataset_name}:")
+    print("-" * 80)
+    stats_df = pd.DataFrame({
+        'Column': list(columns),
+        'Type': [col['type'] for col in columns.values()],
+        'Distinct (est.)': [col['distinct_estimate'] for col in columns.values()],
+        'Min': [col['min'] for col in columns.values()],
+        'Max': [col['max'] for col in columns.values()],
+        'Median': [col.get('quantiles', {}).get('p50', '') for col in columns.values()],
+        'Unparseable': [col.get('unparseable', '') for col in columns.values()],
+        'Top Value': [col['top_values'][0]['value'] if col['top_values'] else '' for col in columns.values()],
+    })
+    print(stats_df.to_string(index=False))
+    
+    # 4. BASIC STATISTICS
     print(f"\nBASIC STATISTICS for {dataset_name}:")
     print("-" * 80)
-    print(f"Total Rows: {len(df)}")
-    print(f"Total Columns: {len(df.columns)}")
-    print(f"Duplicate Rows: {df.duplicated().sum()}")
+    print(f"Total Rows: {profile['rows']}")
+    print(f"Total Columns: {len(columns)}")
+    for key, duplicates in profile['duplicate_estimates'].items():
+        label = 'Duplicate Rows' if key == 'full_row' else f"Duplicate {key}"
+        print(f"{label} (est.): {duplicates['estimate']} (±{duplicates['error_band']})")
 
 def main():
     """Main execution function"""
     # Get the workspace root directory
     workspace_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     
-    # File paths
+    # File paths (optionally given on the command line; .gz/.zst are read in place)
     customers_file = os.path.join(workspace_root, 'data', 'raw', 'task_DE_new_customers.csv')
     orders_file = os.path.join(workspace_root, 'data', 'raw', 'task_DE_new_orders.xml')
+    if len(sys.argv) > 1:
+        customers_file = sys.argv[1]
+    if len(sys.argv) > 2:
+        orders_file = sys.argv[2]
     
     # Check if files exist
     print("Checking for data files...")
@@ -102,26 +114,31 @@ def main():
         print(f"Error: Orders file not found at {orders_file}")
         return
     
-    # Load datasets
-    customers_df = load_customers_csv(customers_file)
-    orders_df = load_orders_xml(orders_file)
+    # Profile datasets
+    customers_profile = profile_customers(customers_file)
+    orders_profile = profile_orders(orders_file)
     
     # Display information for customers
-    if customers_df is not None:
-        display_dataset_info(customers_df, "CUSTOMERS")
+    if customers_profile is not None:
+        display_dataset_info(customers_profile, "CUSTOMERS")
     
     # Display information for orders
-    if orders_df is not None:
-        display_dataset_info(orders_df, "ORDERS")
+    if orders_profile is not None:
+        display_dataset_info(orders_profile, "ORDERS")
+    
+    # Machine-readable profile
+    profile_file = os.path.join(workspace_root, 'output', 'data_profile.json')
+    write_profile({'customers': customers_profile, 'orders': orders_profile}, profile_file)
+    print(f"\nProfile written to {profile_file}")
     
     # Summary
     print("\n" + "=" * 80)
     print("EXPLORATION SUMMARY")
     print("=" * 80)
     
-    if customers_df is not None and orders_df is not None:
-        print(f"Customers loaded: {len(customers_df)} records")
-        print(f"Orders loaded: {len(orders_df)} records")
+    if customers_profile is not None and orders_profile is not None:
+        print(f"Customers profiled: {customers_profile['rows']} records")
+        print(f"Orders profiled: {orders_profile['rows']} records")
     
     print("\n" + "=" * 80)
     print("Exploration completed successfully")
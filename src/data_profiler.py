@@ -0,0 +1,225 @@
+"""
+Streaming Data Profiler
+Profiles the customers CSV and orders XML in a single bounded-memory pass:
+per-column null counts, distinct estimates, min/max/quantiles, top values
+and duplicate-key estimates, written as a machine-readable JSON profile.
+Records are buffered into chunks and each column is profiled a chunk at a
+time with vectorized hashing and parsing
+"""
+import csv
+import json
+import math
+import os
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sketches import HyperLogLog, SpaceSaving, ReservoirQuantiles, hash_series
+from utils.streams import open_input, open_text_input
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Records buffered before each column is profiled
+CHUNK_ROWS = 10_000
+# A column is typed numeric when at least this share of its values parse as numbers
+NUMERIC_TYPE_RATIO = 0.9
+# Duplicate estimates within this many HyperLogLog standard errors are reported as 0
+DUPLICATE_ERROR_STDS = 2
+
+
+def estimate_duplicates(values: int, sketch: HyperLogLog) -> dict:
+    """
+    Duplicates among `values` items, from a distinct-count sketch
+
+    The estimate is values - distinct, so it inherits the sketch's absolute
+    error; it is clamped to 0 when it lies within that error band.
+    """
+    distinct = min(sketch.count(), values)
+    band = math.ceil(DUPLICATE_ERROR_STDS * sketch.relative_error * distinct)
+    estimate = values - distinct
+    return {'estimate': estimate if estimate > band else 0, 'error_band': band}
+
+
+def _row_hashes(frame: pd.DataFrame) -> np.ndarray:
+    """
+    One 64-bit hash per record
+
+    Each present value is hashed together with its column name and the
+    results are summed, so a missing field hashes the same whether its
+    column is absent from the chunk or null in it.
+    """
+    combined = np.zeros(len(frame), dtype=np.uint64)
+    for name in frame.columns:
+        values = frame[name]
+        salted = hash_series(values) ^ hash_series(pd.Series([name]))[0]
+        combined += np.where(values.notna().to_numpy(), pd.util.hash_array(salted), np.uint64(0))
+    return pd.util.hash_array(combined)
+
+
+class ColumnProfile:
+    """Running, bounded-memory statistics for one column"""
+
+    def __init__(self, precision=12, top_k=20, sample_size=2048):
+        self.non_null = 0
+        self.numeric = 0
+        self.distinct = HyperLogLog(precision)
+        self.top = SpaceSaving(top_k * 5)
+        self.numbers = ReservoirQuantiles(sample_size)
+        self.str_min = None
+        self.str_max = None
+        self.top_k = top_k
+
+    def update(self, values: pd.Series):
+        """Profile one chunk of raw values (strings, None when missing)"""
+        values = values.astype('string').str.strip()
+        values = values[values.notna() & (values != '')]
+        if values.empty:
+            return
+        self.non_null += len(values)
+        self.distinct.update_hashes(hash_series(values))
+        self.top.update(values.value_counts(sort=False))
+        low, high = values.min(), values.max()
+        self.str_min = low if self.str_min is None else min(self.str_min, low)
+        self.str_max = high if self.str_max is None else max(self.str_max, high)
+        # 'nan' parses to NaN, which is not counted as a number
+        numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        numbers = numbers[~np.isnan(numbers)]
+        self.numeric += len(numbers)
+        self.numbers.update(numbers)
+
+    def to_dict(self, rows):
+        # A few bad values in a numeric column are counted, not allowed to retype it
+        is_numeric = self.non_null > 0 and self.numeric >= NUMERIC_TYPE_RATIO * self.non_null
+        profile = {
+            'type': 'numeric' if is_numeric else 'string',
+            'non_null': self.non_null,
+            'nulls': rows - self.non_null,
+            'distinct_estimate': min(self.distinct.count(), self.non_null),
+            'distinct_relative_error': round(self.distinct.relative_error, 4),
+            'min': self.numbers.min if is_numeric else self.str_min,
+            'max': self.numbers.max if is_numeric else self.str_max,
+            'top_values': [
+                {'value': value, 'count': int(count), 'max_overcount': int(error)}
+                for value, count, error in self.top.top(self.top_k)
+            ],
+        }
+        if is_numeric:
+            profile['unparseable'] = self.non_null - self.numeric
+            profile['quantiles'] = {
+                f"p{int(q * 100)}": value for q, value in self.numbers.quantiles(QUANTILES).items()
+            }
+        return profile
+
+
+class StreamProfile:
+    """Profile of one record stream, including duplicate-key estimates"""
+
+    def __init__(self, source, key_columns=(), head_rows=5, chunk_rows=CHUNK_ROWS, **column_options):
+        self.source = source
+        self.rows = 0
+        self.head = []
+        self.head_rows = head_rows
+        self.columns = {}
+        self.key_columns = tuple(key_columns)
+        self.row_hashes = HyperLogLog(column_options.get('precision', 12))
+        self.chunk_rows = chunk_rows
+        self._pending = []
+        self._column_options = column_options
+
+    def add(self, record: dict):
+        self._pending.append(record)
+        if len(self._pending) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Profile the buffered records"""
+        if self._pending:
+            frame = pd.DataFrame.from_records(self._pending)
+            self._pending = []
+            self.add_frame(frame)
+
+    def add_frame(self, frame: pd.DataFrame):
+        """Profile a chunk of records given as a DataFrame of raw values"""
+        if len(self.head) < self.head_rows:
+            head = frame.head(self.head_rows - len(self.head)).astype(object)
+            self.head.extend(head.where(head.notna(), None).to_dict('records'))
+        self.rows += len(frame)
+        for name in frame.columns:
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = ColumnProfile(**self._column_options)
+            column.update(frame[name])
+        self.row_hashes.update_hashes(_row_hashes(frame))
+
+    def to_dict(self):
+        self.flush()
+        duplicates = {'full_row': estimate_duplicates(self.rows, self.row_hashes)}
+        for key in self.key_columns:
+            column = self.columns.get(key)
+            if column is not None:
+                duplicates[key] = estimate_duplicates(column.non_null, column.distinct)
+        return {
+            'source': self.source,
+            'rows': self.rows,
+            'head': self.head,
+            'columns': {name: column.to_dict(self.rows) for name, column in self.columns.items()},
+            'duplicate_estimates': duplicates,
+        }
+
+
+def iter_csv_records(path):
+    """Yield CSV rows as dicts without loading the file"""
+    with open_text_input(path) as f:
+        yield from csv.DictReader(f)
+
+
+def iter_csv_chunks(path, chunk_rows=CHUNK_ROWS):
+    """Yield CSV rows as DataFrames of raw strings, chunk_rows at a time"""
+    with open_input(path) as f:
+        yield from pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+
+
+def iter_xml_records(path, record_tag='order'):
+    """Yield XML records as {child_tag: text} dicts, freeing each element after use"""
+    with open_input(path) as f:
+        context = ET.iterparse(f, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'end' and elem.tag == record_tag:
+                yield {child.tag: child.text for child in elem}
+                root.clear()
+
+
+def profile_records(records, source, key_columns=(), **column_options):
+    """Profile any iterable of dict records in one pass"""
+    profile = StreamProfile(source, key_columns, **column_options)
+    for record in records:
+        profile.add(record)
+    return profile.to_dict()
+
+
+def profile_frames(frames, source, key_columns=(), **column_options):
+    """Profile any iterable of DataFrame chunks in one pass"""
+    profile = StreamProfile(source, key_columns, **column_options)
+    for frame in frames:
+        profile.add_frame(frame)
+    return profile.to_dict()
+
+
+def profile_customers_csv(path, **column_options):
+    return profile_frames(iter_csv_chunks(path), path, ('customer_id', 'mobile_number'), **column_options)
+
+
+def profile_orders_xml(path, **column_options):
+    return profile_records(iter_xml_records(path), path, ('order_id',), **column_options)
+
+
+def write_profile(profiles: dict, path):
+    """Write profiles to a JSON file"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2)
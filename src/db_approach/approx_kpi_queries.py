@@ -0,0 +1,121 @@
+"""
+Approximate KPI Calculation using SQL-side Sketches
+MySQL hashes order ids and aggregates them into HyperLogLog registers, so
+only (group, register, rank) rows leave the database; spend leaves as
+hourly per-customer totals for the trailing window only. The KPI frames are then read from
+the same mergeable sketches the in-memory approach uses.
+"""
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.logger import setup_logger
+from utils.sketches import GroupedHyperLogLog
+from inmemory_approach.approx_kpi import (
+    HOUR_NS,
+    KpiSketches,
+    get_repeat_customers_approx,
+    get_monthly_trends_approx,
+    get_top_spenders_last_30_days_approx
+)
+from db_approach.kpi_queries import get_regional_revenue
+
+logger = setup_logger(__name__)
+
+HASH_NAME = 'mysql_md5'
+
+
+def _registers_query(group_expr: str, precision: int) -> str:
+    """SQL returning the max HyperLogLog rank per (group, register)"""
+    shift = 64 - int(precision)
+    mask = (1 << shift) - 1
+    return f"""
+        SELECT
+            grp AS `group`,
+            h >> {shift} AS register,
+            MAX(CASE
+                WHEN (h & {mask}) = 0 THEN {shift + 1}
+                ELSE {shift} - LENGTH(BIN(h & {mask})) + 1
+            END) AS `rank`
+        FROM (
+            SELECT
+                {group_expr} AS grp,
+                CAST(CONV(LEFT(MD5(order_id), 16), 16, 10) AS UNSIGNED) AS h
+            FROM orders
+        ) hashed
+        GROUP BY grp, register
+    """
+
+
+def _grouped_sketch(conn, group_expr, distinct_error):
+    sketch = GroupedHyperLogLog.from_error(distinct_error, hash_name=HASH_NAME)
+    registers = pd.read_sql(_registers_query(group_expr, sketch.precision), conn)
+    return sketch, registers
+
+
+def build_sketches(conn, distinct_error=0.02, window_days=30):
+    """Build KPI sketches from the orders table"""
+    sketches = KpiSketches(distinct_error, window_days)
+
+    monthly, registers = _grouped_sketch(conn, 'order_month', distinct_error)
+    registers['group'] = pd.to_datetime(registers['group']).dt.strftime('%Y-%m')
+    sketches.monthly_orders = monthly.update_registers(registers)
+
+    per_customer, registers = _grouped_sketch(conn, 'mobile_number', distinct_error)
+    sketches.customer_orders = per_customer.update_registers(registers)
+
+    # Hourly spend from the hour the rolling window starts in; stored times
+    # are local, which is also the clock the exact query's window runs on
+    last = pd.read_sql("SELECT MAX(order_date_time) AS last_order FROM orders", conn)['last_order'].iloc[0]
+    if pd.isna(last):
+        return sketches
+    hourly = pd.read_sql("""
+        SELECT
+            TIMESTAMPDIFF(HOUR, '1970-01-01 00:00:00', order_date_time) AS order_hour,
+            mobile_number,
+            SUM(total_amount) AS spend
+        FROM orders
+        WHERE order_date_time >= DATE_FORMAT(
+            DATE_SUB(%s, INTERVAL %s DAY), '%%Y-%%m-%%d %%H:00:00'
+        )
+        GROUP BY order_hour, mobile_number
+    """, conn, params=[pd.Timestamp(last).to_pydatetime(), int(window_days)])
+    sketches.last_order_ns = pd.Timestamp(last).as_unit('ns').value
+    sketches.add_spend(
+        hourly['order_hour'].to_numpy(dtype='int64') * HOUR_NS,
+        hourly['mobile_number'].astype('string').to_numpy(dtype=object),
+        hourly['spend'].to_numpy(dtype='float64')
+    )
+
+    return sketches
+
+
+def calculate_all_kpis_approx(conn, top_n=10, distinct_error=0.02):
+    """Calculate all KPIs with sketch-based approximations where applicable"""
+    logger.info("Calculating approximate KPIs from database")
+    sketches = build_sketches(conn, distinct_error)
+
+    customers = pd.read_sql(
+        "SELECT customer_id, customer_name, mobile_number, region FROM customers", conn
+    )
+    customers['mobile_number'] = customers['mobile_number'].astype('string')
+
+    # Match the exact query's INNER JOIN and column order
+    repeat_customers = get_repeat_customers_approx(sketches, customers)
+    repeat_customers = repeat_customers.dropna(subset=['customer_id'])[
+        ['customer_id', 'customer_name', 'mobile_number', 'region', 'order_count', 'relative_error']
+    ].reset_index(drop=True)
+
+    kpis = {
+        'repeat_customers': repeat_customers,
+        'monthly_trends': get_monthly_trends_approx(sketches),
+        'regional_revenue': get_regional_revenue(conn),
+        'top_spenders_last_30_days': get_top_spenders_last_30_days_approx(sketches, customers, top_n)
+    }
+
+    logger.info(
+        f"Approximate KPIs calculated: distinct counts ±{sketches.monthly_orders.relative_error:.2%} "
+        f"(1 std. error); top spenders exact up to the window's first hour (max_error)"
+    )
+    return kpis
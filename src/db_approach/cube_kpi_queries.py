@@ -0,0 +1,75 @@
+"""
+KPI Calculation from an Aggregate Cube built in SQL
+MySQL aggregates orders once into (customer, local day, rolling-day offset)
+cells, and every KPI is answered by slicing and rolling up the same cube
+the in-memory approach uses instead of running one query per KPI.
+"""
+import pandas as pd
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from utils.logger import setup_logger
+from inmemory_approach.kpi_cube import (
+    KpiCube,
+    get_repeat_customers_cube,
+    get_monthly_trends_cube,
+    get_regional_revenue_cube,
+    get_regional_monthly_revenue_cube,
+    get_top_spenders_last_30_days_cube
+)
+
+logger = setup_logger(__name__)
+
+# order_date_time is stored in local time, so DATE() is the local day.
+# days_ago counts whole 24h periods before the latest order, rounded up.
+CUBE_CELLS_SQL = """
+    SELECT
+        o.mobile_number,
+        DATE(o.order_date_time) AS order_day,
+        CEIL(TIMESTAMPDIFF(MICROSECOND, o.order_date_time, ref.max_ts) / 86400000000) AS days_ago,
+        COUNT(*) AS orders,
+        SUM(o.total_amount) AS spend
+    FROM orders o
+    CROSS JOIN (SELECT MAX(order_date_time) AS max_ts FROM orders) ref
+    GROUP BY o.mobile_number, order_day, days_ago
+"""
+
+CUBE_CUSTOMERS_SQL = """
+    SELECT customer_id, customer_name, mobile_number, region
+    FROM customers
+"""
+
+
+def build_cube(conn, tz: str) -> KpiCube:
+    """Build the KPI cube from the orders and customers tables"""
+    cells = pd.read_sql(CUBE_CELLS_SQL, conn)
+    cells['mobile_number'] = cells['mobile_number'].astype('string')
+    customers = pd.read_sql(CUBE_CUSTOMERS_SQL, conn).astype('string')
+    reference = pd.read_sql("SELECT MAX(order_date_time) AS max_ts FROM orders", conn)['max_ts'].iloc[0]
+    cube = KpiCube.from_cells(cells, customers, tz, reference)
+    logger.info(f"Built KPI cube from database: {len(cube)} cells")
+    return cube
+
+
+def calculate_all_kpis_cube(conn, tz: str, top_n=10):
+    """Calculate all KPIs from the cube and return as dictionary"""
+    logger.info("Calculating KPIs from database cube")
+    cube = build_cube(conn, tz)
+
+    # Match the exact query's INNER JOIN and column order
+    repeat_customers = get_repeat_customers_cube(cube)
+    repeat_customers = repeat_customers.dropna(subset=['customer_id'])[
+        ['customer_id', 'customer_name', 'mobile_number', 'region', 'order_count']
+    ].reset_index(drop=True)
+
+    kpis = {
+        'repeat_customers': repeat_customers,
+        'monthly_trends': get_monthly_trends_cube(cube),
+        'regional_revenue': get_regional_revenue_cube(cube),
+        'regional_monthly_revenue': get_regional_monthly_revenue_cube(cube),
+        'top_spenders_last_30_days': get_top_spenders_last_30_days_cube(cube, top_n)
+    }
+
+    logger.info("All KPIs calculated successfully")
+    return kpis
@@ -19,73 +19,94 @@ def get_connection():
     return mysql.connector.connect(**DB_CONFIG)
 
 
+# KPI SQL is kept at module level so the query benchmark harness can
+# EXPLAIN exactly what the pipeline runs.
+# order_id is the primary key of orders, so COUNT(*) is equivalent to
+# COUNT(DISTINCT order_id) and avoids a per-group temporary table.
+REPEAT_CUSTOMERS_SQL = """
+    SELECT 
+        c.customer_id,
+        c.customer_name,
+        c.mobile_number,
+        c.region,
+        COUNT(*) AS order_count
+    FROM customers c
+    INNER JOIN orders o ON c.mobile_number = o.mobile_number
+    GROUP BY c.customer_id, c.customer_name, c.mobile_number, c.region
+    HAVING order_count > 1
+    ORDER BY order_count DESC, c.mobile_number
+"""
+
+# Groups on the stored order_month column (idx_month_order) instead of a
+# DATE_FORMAT expression that cannot use an index.
+MONTHLY_TRENDS_SQL = """
+    SELECT 
+        order_month,
+        COUNT(*) AS order_count
+    FROM orders
+    GROUP BY order_month
+    ORDER BY order_month
+"""
+
+REGIONAL_REVENUE_SQL = """
+    SELECT 
+        COALESCE(c.region, 'Unknown') AS region,
+        SUM(o.total_amount) AS revenue
+    FROM orders o
+    LEFT JOIN customers c ON o.mobile_number = c.mobile_number
+    GROUP BY region
+    ORDER BY revenue DESC
+"""
+
+TOP_SPENDERS_LAST_30_DAYS_SQL = """
+    SELECT 
+        o.mobile_number,
+        SUM(o.total_amount) AS total_spend,
+        c.customer_id,
+        c.customer_name,
+        c.region
+    FROM orders o
+    LEFT JOIN customers c ON o.mobile_number = c.mobile_number
+    WHERE o.order_date_time >= DATE_SUB(
+        (SELECT MAX(order_date_time) FROM orders), 
+        INTERVAL 30 DAY
+    )
+    GROUP BY o.mobile_number, c.customer_id, c.customer_name, c.region
+    ORDER BY total_spend DESC
+    LIMIT %s
+"""
+
+
+def kpi_query_specs(top_n=10):
+    """Return {kpi_name: (sql, params)} for every KPI query"""
+    return {
+        'repeat_customers': (REPEAT_CUSTOMERS_SQL, None),
+        'monthly_trends': (MONTHLY_TRENDS_SQL, None),
+        'regional_revenue': (REGIONAL_REVENUE_SQL, None),
+        'top_spenders_last_30_days': (TOP_SPENDERS_LAST_30_DAYS_SQL, [int(top_n)]),
+    }
+
+
 def get_repeat_customers(conn):
     """KPI 1: Customers with more than one order"""
-    query = """
-        SELECT 
-            c.customer_id,
-            c.customer_name,
-            c.mobile_number,
-            c.region,
-            COUNT(DISTINCT o.order_id) AS order_count
-        FROM customers c
-        INNER JOIN orders o ON c.mobile_number = o.mobile_number
-        GROUP BY c.customer_id, c.customer_name, c.mobile_number, c.region
-        HAVING order_count > 1
-        ORDER BY order_count DESC, c.mobile_number
-    """
-    return pd.read_sql(query, conn)
+    return pd.read_sql(REPEAT_CUSTOMERS_SQL, conn)
 
 
 def get_monthly_trends(conn):
     """KPI 2: Monthly order trends"""
-    query = """
-        SELECT 
-            DATE_FORMAT(order_date_time, '%Y-%m-01') AS order_month,
-            COUNT(DISTINCT order_id) AS order_count
-        FROM orders
-        GROUP BY order_month
-        ORDER BY order_month
-    """
-    df = pd.read_sql(query, conn)
+    df = pd.read_sql(MONTHLY_TRENDS_SQL, conn)
     df['order_month'] = pd.to_datetime(df['order_month'])
     return df
 
 
 def get_regional_revenue(conn):
     """KPI 3: Revenue by region"""
-    query = """
-        SELECT 
-            COALESCE(c.region, 'Unknown') AS region,
-            SUM(o.total_amount) AS revenue
-        FROM orders o
-        LEFT JOIN customers c ON o.mobile_number = c.mobile_number
-        GROUP BY region
-        ORDER BY revenue DESC
-    """
-    return pd.read_sql(query, conn)
+    return pd.read_sql(REGIONAL_REVENUE_SQL, conn)
 
 
 def get_top_spenders_last_30_days(conn, top_n=10):
     """KPI 4: Top spenders in last 30 days (parameterized LIMIT)."""
-    query = """
-        SELECT 
-            o.mobile_number,
-            SUM(o.total_amount) AS total_spend,
-            c.customer_id,
-            c.customer_name,
-            c.region
-        FROM orders o
-        LEFT JOIN customers c ON o.mobile_number = c.mobile_number
-        WHERE o.order_date_time >= DATE_SUB(
-            (SELECT MAX(order_date_time) FROM orders), 
-            INTERVAL 30 DAY
-        )
-        GROUP BY o.mobile_number, c.customer_id, c.customer_name, c.region
-        ORDER BY total_spend DESC
-        LIMIT %s
-    """
-    return pd.read_sql(query, conn, params=[int(top_n)])
+    return pd.read_sql(TOP_SPENDERS_LAST_30_DAYS_SQL, conn, params=[int(top_n)])
 
 
 def calculate_all_kpis(conn, top_n=10):
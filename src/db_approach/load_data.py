@@ -6,26 +6,33 @@ import pandas as pd
 import mysql.connector
 from mysql.connector import Error
 from pathlib import Path
+import hashlib
 import sys
 import re
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 from utils.config import CONFIG, DB_CONFIG
-from utils.logger import setup_logger
+from utils.logger import setup_logger, ThrottledLogger
+from utils.streams import open_input, input_fingerprint
+from inmemory_approach.validator import validate_orders
 
 logger = setup_logger(__name__)
 
+# Row-loop progress: at most one line every 5 seconds per table
+progress = ThrottledLogger(logger, interval=5.0)
+
 
 def _is_safe_identifier(name: str) -> bool:
     """Allow only alphanumeric and underscore for identifiers."""
     return bool(re.fullmatch(r"[A-Za-z0-9_]+", name or ""))
 
 
-def create_database_if_not_exists():
-    """Create database if it doesn't exist"""
+def create_database_if_not_exists(db_name=None):
+    """Create database if it doesn't exist (defaults to DB_CONFIG['database'])"""
     try:
         config = DB_CONFIG.copy()
-        db_name = config.pop('database')
+        db_name = db_name or config['database']
+        config.pop('database')
         if not _is_safe_identifier(db_name):
             raise ValueError("Unsafe database name in configuration")
 
@@ -41,9 +48,12 @@ def create_database_if_not_exists():
         raise
 
 
-def get_connection():
+def get_connection(db_name=None):
     """Create MySQL database connection and ensure it's established.
 
+    Args:
+        db_name: Database to connect to (defaults to DB_CONFIG['database']).
+
     Returns:
         mysql.connector.connection.MySQLConnection: Active DB connection.
 
@@ -51,7 +61,10 @@ def get_connection():
         Error: If connection cannot be established.
     """
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
+        config = DB_CONFIG.copy()
+        if db_name:
+            config['database'] = db_name
+        conn = mysql.connector.connect(**config)
         if not conn or not conn.is_connected():
             raise Error("MySQL connection not established")
         return conn
@@ -79,9 +92,50 @@ def create_tables(conn):
         raise
 
 
+def load_fingerprint(table, path) -> str:
+    """
+    Version key of the data a loader puts into `table`
+
+    Orders are stored in local time, so their key also covers TZ.
+    """
+    source = input_fingerprint(path)
+    if table == 'orders':
+        source += f"|TZ={CONFIG['TZ']}"
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def _record_load(conn, table, path=None):
+    """Record which input version `table` now holds; None while it is being (re)loaded"""
+    cursor = conn.cursor()
+    if path is None:
+        cursor.execute("DELETE FROM load_metadata WHERE table_name = %s", (table,))
+    else:
+        cursor.execute("""
+            INSERT INTO load_metadata (table_name, fingerprint)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE fingerprint = VALUES(fingerprint)
+        """, (table, load_fingerprint(table, path)))
+    conn.commit()
+    cursor.close()
+
+
+def loaded_fingerprints(conn) -> dict:
+    """{table: fingerprint} of the inputs currently loaded (empty if unknown)"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT table_name, fingerprint FROM load_metadata")
+        return dict(cursor.fetchall())
+    except Error:
+        return {}
+    finally:
+        cursor.close()
+
+
 def load_customers_to_db(conn, csv_path):
-    """Load customers from CSV to database"""
-    df = pd.read_csv(csv_path, dtype=str)
+    """Load customers from CSV (plain, gzip or zstd) to database"""
+    _record_load(conn, 'customers')
+    with open_input(csv_path) as f:
+        df = pd.read_csv(f, dtype=str)
     df = df.fillna('')
     df['mobile_number'] = df['mobile_number'].astype('string')
     
@@ -94,35 +148,34 @@ def load_customers_to_db(conn, csv_path):
             region = VALUES(region)
     """
     
-    for _, row in df.iterrows():
+    for i, (_, row) in enumerate(df.iterrows(), 1):
         cursor.execute(insert_query, (
             row['customer_id'],
             row['customer_name'] or 'Unknown',
             row['mobile_number'],
             row['region'] or 'Unknown'
         ))
+        progress.info('customers', "Inserted %d/%d customers", i, len(df))
     
     conn.commit()
+    _record_load(conn, 'customers', csv_path)
     logger.info(f"Loaded {len(df)} customers into database")
 
 
 def load_orders_to_db(conn, xml_path):
-    """Load orders from XML to database"""
-    df = pd.read_xml(xml_path)
+    """Load orders from XML (plain, gzip or zstd) to database"""
+    _record_load(conn, 'orders')
+    with open_input(xml_path) as f:
+        df = pd.read_xml(f)
     
     # Convert mobile_number properly
     df['mobile_number'] = df['mobile_number'].astype('Int64').astype('string')
+    df['order_id'] = df['order_id'].astype('string')
     
-    # Convert numeric fields
-    df['sku_count'] = pd.to_numeric(df['sku_count'], errors='coerce').fillna(0).astype('int64')
-    df['total_amount'] = pd.to_numeric(df['total_amount'], errors='coerce').fillna(0.0)
-    
-    # Parse datetime
-    df['order_date_time'] = pd.to_datetime(df['order_date_time'], errors='coerce')
-    
-    # Remove invalid rows
-    df = df.dropna(subset=['order_id', 'mobile_number', 'order_date_time'])
-    df = df.drop_duplicates(subset=['order_id'], keep='first')
+    # Same validation rules as the in-memory approach (numeric coercion,
+    # timestamp parsing, invalid rows and duplicates); MySQL stores local time
+    df = validate_orders(df, tz=CONFIG['TZ']).clean
+    df['order_date_time'] = df['order_date_time'].dt.tz_convert(CONFIG['TZ']).dt.tz_localize(None)
     
     cursor = conn.cursor()
     insert_query = """
@@ -133,7 +186,7 @@ def load_orders_to_db(conn, xml_path):
             total_amount = VALUES(total_amount)
     """
     
-    for _, row in df.iterrows():
+    for i, (_, row) in enumerate(df.iterrows(), 1):
         cursor.execute(insert_query, (
             row['order_id'],
             row['mobile_number'],
@@ -141,8 +194,10 @@ def load_orders_to_db(conn, xml_path):
             float(row['total_amount']),
             row['order_date_time']
         ))
+        progress.info('orders', "Inserted %d/%d orders", i, len(df))
     
     conn.commit()
+    _record_load(conn, 'orders', xml_path)
     logger.info(f"Loaded {len(df)} orders into database")
 
 
@@ -3,14 +3,19 @@ Database Approach - Main Pipeline
 Load data to MySQL, calculate KPIs, and generate reports
 """
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from db_approach.load_data import get_connection, create_database_if_not_exists, create_tables, load_customers_to_db, load_orders_to_db
 from db_approach.kpi_queries import calculate_all_kpis
+from db_approach.approx_kpi_queries import calculate_all_kpis_approx
+from db_approach.cube_kpi_queries import calculate_all_kpis_cube
 from utils.config import CONFIG
 from utils.logger import setup_logger
+from utils.snapshot_store import snapshot_run
+from utils.streams import input_fingerprint
 
 logger = setup_logger(__name__)
 
@@ -26,6 +31,8 @@ def save_reports(kpis, output_dir):
         'db_regional_revenue.csv': kpis['regional_revenue'],
         'db_top_spenders_last_30_days.csv': kpis['top_spenders_last_30_days']
     }
+    if 'regional_monthly_revenue' in kpis:
+        reports['db_regional_monthly_revenue.csv'] = kpis['regional_monthly_revenue']
     
     for filename, df in reports.items():
         filepath = output_path / filename
@@ -33,6 +40,18 @@ def save_reports(kpis, output_dir):
         logger.info(f"Saved report: {filepath}")
 
 
+def save_snapshot(kpis):
+    """Append the KPIs to the snapshot history under the in-memory KPI names"""
+    if not CONFIG['SNAPSHOTS']:
+        return None
+    names = {'top_spenders_last_30_days': 'top_spenders'}
+    return snapshot_run(
+        {names.get(kpi, kpi): df for kpi, df in kpis.items()},
+        input_fingerprint(CONFIG['CUSTOMERS_CSV'], CONFIG['ORDERS_XML']), 'db',
+        CONFIG['SNAPSHOT_DIR'], compact_days=CONFIG['SNAPSHOT_COMPACT_DAYS']
+    )
+
+
 def display_results(kpis):
     """Display KPI results in console"""
     print("\n" + "="*80)
@@ -54,34 +73,63 @@ def display_results(kpis):
     print("\n" + "="*80)
 
 
-def main():
-    """Execute complete database pipeline"""
+def run_pipeline(load=True):
+    """
+    Load data (unless the database is already warm) and calculate KPIs
+
+    Returns:
+        (kpis, timings) where timings holds seconds per stage
+    """
+    timings = {}
+    
+    # Create database if not exists
+    create_database_if_not_exists()
+    
+    # Connect to database
+    conn = get_connection()
+    logger.info("Connected to MySQL database")
+    
     try:
-        logger.info("Starting Akasa Air - Database (MySQL) pipeline")
-        
-        # Create database if not exists
-        create_database_if_not_exists()
-        
-        # Connect to database
-        conn = get_connection()
-        logger.info("Connected to MySQL database")
-        
-        # Create tables
-        create_tables(conn)
-        
-        # Load data
-        logger.info("Loading data into database...")
-        load_customers_to_db(conn, CONFIG['CUSTOMERS_CSV'])
-        load_orders_to_db(conn, CONFIG['ORDERS_XML'])
+        if load:
+            # Create tables and load data
+            start = time.perf_counter()
+            create_tables(conn)
+            logger.info("Loading data into database...")
+            load_customers_to_db(conn, CONFIG['CUSTOMERS_CSV'])
+            load_orders_to_db(conn, CONFIG['ORDERS_XML'])
+            timings['load'] = time.perf_counter() - start
+        else:
+            logger.info("Reusing data already loaded in database")
         
         # Calculate KPIs
-        kpis = calculate_all_kpis(conn, top_n=CONFIG['TOP_N'])
-        
+        start = time.perf_counter()
+        if CONFIG['KPI_CUBE']:
+            kpis = calculate_all_kpis_cube(conn, tz=CONFIG['TZ'], top_n=CONFIG['TOP_N'])
+        elif CONFIG['APPROX_KPIS']:
+            kpis = calculate_all_kpis_approx(
+                conn, top_n=CONFIG['TOP_N'],
+                distinct_error=CONFIG['APPROX_DISTINCT_ERROR']
+            )
+        else:
+            kpis = calculate_all_kpis(conn, top_n=CONFIG['TOP_N'])
+        timings['kpis'] = time.perf_counter() - start
+    finally:
         # Close connection
         conn.close()
+    
+    return kpis, timings
+
+
+def main():
+    """Execute complete database pipeline"""
+    try:
+        logger.info("Starting Akasa Air - Database (MySQL) pipeline")
+        
+        kpis, _ = run_pipeline()
         
         # Save reports
         save_reports(kpis, CONFIG['REPORTS_DIR'])
+        save_snapshot(kpis)
         
         # Display results
         display_results(kpis)
@@ -0,0 +1,396 @@
+"""
+KPI Query Benchmark Harness
+Runs every KPI query with EXPLAIN / EXPLAIN ANALYZE against a scaled
+synthetic dataset, records plans and timings as a baseline and flags
+regressions against a previously saved baseline
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from mysql.connector import Error
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db_approach.load_data import get_connection, create_database_if_not_exists, create_tables
+from db_approach.kpi_queries import kpi_query_specs
+from utils.config import CONFIG, DB_CONFIG
+from utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+BENCHMARK_DIR = BASE_DIR / 'database' / 'benchmarks'
+DEFAULT_BASELINE = BENCHMARK_DIR / 'kpi_query_baseline.json'
+
+# Indexes and KPI SQL as they were before the covering indexes and the
+# stored order_month key, so --compare measures that change on identical data
+PRE_INDEX_SCHEMA = [
+    """
+    ALTER TABLE customers
+        DROP INDEX idx_mobile_customer,
+        ADD INDEX idx_mobile (mobile_number)
+    """,
+    """
+    ALTER TABLE orders
+        DROP INDEX idx_mobile_date_amount,
+        DROP INDEX idx_date_mobile_amount,
+        DROP INDEX idx_month_order,
+        DROP COLUMN order_month,
+        ADD INDEX idx_mobile (mobile_number),
+        ADD INDEX idx_order_date (order_date_time)
+    """,
+]
+
+PRE_INDEX_QUERIES = {
+    'repeat_customers': """
+        SELECT 
+            c.customer_id,
+            c.customer_name,
+            c.mobile_number,
+            c.region,
+            COUNT(DISTINCT o.order_id) AS order_count
+        FROM customers c
+        INNER JOIN orders o ON c.mobile_number = o.mobile_number
+        GROUP BY c.customer_id, c.customer_name, c.mobile_number, c.region
+        HAVING order_count > 1
+        ORDER BY order_count DESC, c.mobile_number
+    """,
+    'monthly_trends': """
+        SELECT 
+            DATE_FORMAT(order_date_time, '%Y-%m-01') AS order_month,
+            COUNT(DISTINCT order_id) AS order_count
+        FROM orders
+        GROUP BY order_month
+        ORDER BY order_month
+    """,
+}
+
+REGIONS = ['North', 'South', 'East', 'West', 'Central']
+
+
+def generate_scaled_dataset(n_customers, orders_per_customer=5, days=365, seed=42):
+    """
+    Generate synthetic customer and order rows
+
+    Returns:
+        (customers, orders) as lists of tuples matching the INSERT column order
+    """
+    rng = random.Random(seed)
+    end = datetime(2025, 12, 31, 23, 59, 59)
+
+    customers = []
+    orders = []
+    order_seq = 0
+    for i in range(n_customers):
+        mobile = str(9000000000 + i)
+        customers.append((f"CUST-{i:08d}", f"Customer {i}", mobile, rng.choice(REGIONS)))
+        for _ in range(rng.randint(1, 2 * orders_per_customer - 1)):
+            order_seq += 1
+            ts = end - timedelta(seconds=rng.randint(0, days * 86400))
+            orders.append((
+                f"ORD-{order_seq:010d}",
+                mobile,
+                rng.randint(1, 5),
+                round(rng.uniform(100, 20000), 2),
+                ts,
+            ))
+    return customers, orders
+
+
+def load_scaled_dataset(conn, n_customers, orders_per_customer=5, seed=42, batch_size=5000):
+    """Recreate the tables and bulk load a synthetic dataset"""
+    create_tables(conn)
+    customers, orders = generate_scaled_dataset(n_customers, orders_per_customer, seed=seed)
+
+    cursor = conn.cursor()
+    customer_sql = """
+        INSERT INTO customers (customer_id, customer_name, mobile_number, region)
+        VALUES (%s, %s, %s, %s)
+    """
+    order_sql = """
+        INSERT INTO orders (order_id, mobile_number, sku_count, total_amount, order_date_time)
+        VALUES (%s, %s, %s, %s, %s)
+    """
+    for sql, rows in ((customer_sql, customers), (order_sql, orders)):
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+    conn.commit()
+    cursor.execute("ANALYZE TABLE customers, orders")
+    cursor.fetchall()
+    cursor.close()
+
+    logger.info(f"Loaded scaled dataset: {len(customers)} customers, {len(orders)} orders")
+    return len(customers), len(orders)
+
+
+def apply_pre_index_schema(conn):
+    """Swap the loaded tables back to the pre-change indexes"""
+    cursor = conn.cursor()
+    for statement in PRE_INDEX_SCHEMA:
+        cursor.execute(statement)
+    cursor.execute("ANALYZE TABLE customers, orders")
+    cursor.fetchall()
+    cursor.close()
+    logger.info("Applied pre-change indexes")
+
+
+def pre_index_query_specs(top_n=10):
+    """Return kpi_query_specs() with the pre-change SQL substituted"""
+    specs = kpi_query_specs(top_n)
+    for name, sql in PRE_INDEX_QUERIES.items():
+        specs[name] = (sql, specs[name][1])
+    return specs
+
+
+def explain_plan(conn, sql, params=None):
+    """Return the EXPLAIN FORMAT=JSON plan of a query as a dict"""
+    cursor = conn.cursor()
+    cursor.execute("EXPLAIN FORMAT=JSON " + sql, params)
+    row = cursor.fetchone()
+    cursor.close()
+    return json.loads(row[0])
+
+
+def explain_analyze(conn, sql, params=None):
+    """Return the EXPLAIN ANALYZE tree (MySQL 8.0.18+), or None if unsupported"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("EXPLAIN ANALYZE " + sql, params)
+        return "\n".join(row[0] for row in cursor.fetchall())
+    except Error as e:
+        logger.warning(f"EXPLAIN ANALYZE not available: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def plan_flags(plan):
+    """
+    Collect plan properties worth tracking from an EXPLAIN JSON plan
+
+    Returns sorted flags such as 'temporary', 'filesort', 'full_scan:orders'
+    and 'covering:orders'
+    """
+    flags = set()
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('using_temporary_table'):
+                flags.add('temporary')
+            if node.get('using_filesort'):
+                flags.add('filesort')
+            if 'table_name' in node:
+                table = node['table_name']
+                if node.get('access_type') == 'ALL':
+                    flags.add(f"full_scan:{table}")
+                if node.get('using_index'):
+                    flags.add(f"covering:{table}")
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(plan)
+    return sorted(flags)
+
+
+def time_query(conn, sql, params=None, repeats=5):
+    """Execute a query several times and return timings in milliseconds"""
+    timings = []
+    cursor = conn.cursor()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    cursor.close()
+    return timings
+
+
+def run_benchmark(conn, top_n=10, repeats=5, analyze=True, specs=None):
+    """Capture plan, flags and timings for every KPI query"""
+    results = {}
+    for name, (sql, params) in (specs or kpi_query_specs(top_n)).items():
+        plan = explain_plan(conn, sql, params)
+        timings = time_query(conn, sql, params, repeats)
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'flags': plan_flags(plan),
+            'plan': plan,
+            'analyze': explain_analyze(conn, sql, params) if analyze else None,
+        }
+        logger.info(
+            f"{name}: median {results[name]['median_ms']} ms, "
+            f"flags {results[name]['flags']}"
+        )
+    return results
+
+
+def save_baseline(results, path=DEFAULT_BASELINE, meta=None):
+    """Write benchmark results to a JSON baseline file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'meta': meta or {},
+        'queries': results,
+    }
+    path.write_text(json.dumps(payload, indent=2, default=str))
+    logger.info(f"Saved query baseline: {path}")
+
+
+def load_baseline(path=DEFAULT_BASELINE):
+    """Load a JSON baseline file, or None if it doesn't exist"""
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def find_regressions(results, baseline, time_tolerance=1.5):
+    """
+    Compare benchmark results against a baseline
+
+    A query regresses when its median time exceeds the baseline median by
+    more than time_tolerance, or when its plan gains a temporary table,
+    filesort or full scan that the baseline did not have.
+
+    Returns:
+        List of human readable regression messages
+    """
+    regressions = []
+    base_queries = (baseline or {}).get('queries', {})
+    for name, result in results.items():
+        base = base_queries.get(name)
+        if base is None:
+            continue
+        if result['median_ms'] > base['median_ms'] * time_tolerance:
+            regressions.append(
+                f"{name}: median {result['median_ms']} ms vs baseline {base['median_ms']} ms"
+            )
+        new_flags = [
+            flag for flag in set(result['flags']) - set(base['flags'])
+            if not flag.startswith('covering:')
+        ]
+        lost_covering = [
+            flag for flag in set(base['flags']) - set(result['flags'])
+            if flag.startswith('covering:')
+        ]
+        for flag in sorted(new_flags + lost_covering):
+            verb = 'lost' if flag in lost_covering else 'new'
+            regressions.append(f"{name}: {verb} plan property '{flag}'")
+    return regressions
+
+
+def compare_results(before, after):
+    """
+    Summarise a before/after benchmark pair
+
+    Returns:
+        One human readable line per query with medians, speedup and plan flags
+    """
+    lines = []
+    for name, result in after.items():
+        base = before.get(name)
+        if base is None:
+            continue
+        speedup = base['median_ms'] / result['median_ms'] if result['median_ms'] else float('inf')
+        lines.append(
+            f"{name}: {base['median_ms']} ms -> {result['median_ms']} ms ({speedup:.2f}x), "
+            f"flags {base['flags']} -> {result['flags']}"
+        )
+    return lines
+
+
+def run_comparison(conn, args, output_dir=BENCHMARK_DIR):
+    """
+    Benchmark the pre-change and current schema on the same synthetic data
+
+    Both runs reload the dataset from the same seed; results are written to
+    kpi_query_before.json and kpi_query_after.json under output_dir.
+    """
+    meta = {
+        'customers': args.customers,
+        'orders_per_customer': args.orders_per_customer,
+        'repeats': args.repeats,
+    }
+    output_dir = Path(output_dir)
+
+    load_scaled_dataset(conn, args.customers, args.orders_per_customer)
+    apply_pre_index_schema(conn)
+    before = run_benchmark(
+        conn, top_n=CONFIG['TOP_N'], repeats=args.repeats,
+        specs=pre_index_query_specs(CONFIG['TOP_N'])
+    )
+    save_baseline(before, output_dir / 'kpi_query_before.json', meta={**meta, 'variant': 'before'})
+
+    load_scaled_dataset(conn, args.customers, args.orders_per_customer)
+    after = run_benchmark(conn, top_n=CONFIG['TOP_N'], repeats=args.repeats)
+    save_baseline(after, output_dir / 'kpi_query_after.json', meta={**meta, 'variant': 'after'})
+
+    for line in compare_results(before, after):
+        logger.info(line)
+    return before, after
+
+
+def main():
+    """Benchmark the KPI queries on a scratch database"""
+    parser = argparse.ArgumentParser(description="KPI query plan and timing harness")
+    parser.add_argument('--customers', type=int, default=100000, help="Synthetic customer count")
+    parser.add_argument('--orders-per-customer', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--tolerance', type=float, default=1.5)
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Overwrite the baseline with this run's results")
+    parser.add_argument('--skip-load', action='store_true',
+                        help="Reuse the data already in the benchmark database")
+    parser.add_argument('--compare', action='store_true',
+                        help="Benchmark the pre-change indexes and SQL against the current schema")
+    parser.add_argument('--output-dir', default=str(BENCHMARK_DIR),
+                        help="Where --compare writes its before/after results")
+    args = parser.parse_args()
+
+    db_name = f"{DB_CONFIG['database']}_bench"
+    try:
+        create_database_if_not_exists(db_name)
+        conn = get_connection(db_name)
+        if args.compare:
+            run_comparison(conn, args, args.output_dir)
+            conn.close()
+            return
+        if not args.skip_load:
+            load_scaled_dataset(conn, args.customers, args.orders_per_customer)
+
+        results = run_benchmark(conn, top_n=CONFIG['TOP_N'], repeats=args.repeats)
+        conn.close()
+    except Exception as e:
+        logger.error(f"Query benchmark failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None or args.update_baseline:
+        save_baseline(results, args.baseline, meta={
+            'customers': args.customers,
+            'orders_per_customer': args.orders_per_customer,
+            'repeats': args.repeats,
+        })
+        return
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    if regressions:
+        for message in regressions:
+            logger.warning(f"Regression: {message}")
+        sys.exit(2)
+    logger.info("No query regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
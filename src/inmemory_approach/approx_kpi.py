@@ -0,0 +1,296 @@
+"""
+In-Memory Approach - Approximate KPIs
+Sketch-based KPIs: HyperLogLog distinct order counts per month and per
+customer, and top spenders from hourly per-customer spend kept only for
+the trailing window. The sketches are persisted between runs and only
+orders from days not yet folded in are added to them.
+"""
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.sketches import GroupedHyperLogLog, hash_series
+
+log = logging.getLogger('akasa')
+
+HOUR_NS = 3600 * 10**9
+DAY_NS = 24 * HOUR_NS
+
+
+def _epoch_ns(order_ts: pd.Series) -> np.ndarray:
+    """Order timestamps as int64 ns since the epoch (UTC)"""
+    return order_ts.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy().astype('datetime64[ns]').astype('int64')
+
+
+def day_stats(orders: pd.DataFrame) -> dict:
+    """
+    {UTC day: [orders, spend in cents, sum of order seconds]} for change detection
+
+    All three are integer sums, so they do not depend on row order.
+    """
+    if orders.empty:
+        return {}
+    ns = _epoch_ns(orders['order_date_time'])
+    days, inverse = np.unique(ns // DAY_NS, return_inverse=True)
+    cents = np.round(orders['total_amount'].to_numpy(dtype='float64') * 100)
+    stats = np.column_stack([
+        np.bincount(inverse),
+        np.bincount(inverse, weights=cents),
+        np.bincount(inverse, weights=ns // 10**9),
+    ]).astype('int64')
+    return {int(day): row.tolist() for day, row in zip(days, stats)}
+
+
+class KpiSketches:
+    """
+    Mergeable state backing the approximate KPIs
+
+    Distinct order counts are HyperLogLog sketches. Top spenders keep exact
+    per-customer spend per hour, and only for the trailing `window_days`
+    (plus the hour the window starts in), so that state stays bounded by the
+    orders in the window however long the stream is. `days` records which
+    UTC days have been folded in (see day_stats).
+    """
+
+    def __init__(self, distinct_error: float = 0.02, window_days: int = 30):
+        self.distinct_error = distinct_error
+        self.window_days = window_days
+        self.monthly_orders = GroupedHyperLogLog.from_error(distinct_error)
+        self.customer_orders = GroupedHyperLogLog.from_error(distinct_error)
+        # Spend indexed by (hour since epoch, mobile_number)
+        self.hourly_spend = pd.Series(
+            [], dtype='float64',
+            index=pd.MultiIndex.from_arrays([[], []], names=['hour', 'mobile_number'])
+        )
+        # Latest order time, as ns since epoch on the clock the orders were bucketed on
+        self.last_order_ns = None
+        self.days = {}
+
+    def update(self, orders: pd.DataFrame, tz: str) -> 'KpiSketches':
+        """Fold a chunk of cleaned orders into the sketches"""
+        if orders.empty:
+            return self
+        order_ts = orders['order_date_time']
+        local = order_ts.dt.tz_convert(tz).dt.tz_localize(None).to_numpy().astype('datetime64[M]')
+        month_codes, month_values = pd.factorize(local)
+        # Format only the distinct month labels, not every row
+        months = pd.Index(month_values).strftime('%Y-%m').to_numpy(dtype=object)[month_codes]
+        mobiles = orders['mobile_number'].astype('string').to_numpy(dtype=object)
+        order_hashes = hash_series(orders['order_id'])
+
+        self.monthly_orders.update_hashes(months, order_hashes)
+        self.customer_orders.update_hashes(mobiles, order_hashes)
+
+        # Window arithmetic is absolute time, like the exact rolling 30 x 24h window
+        self.add_spend(_epoch_ns(order_ts), mobiles, orders['total_amount'].to_numpy(dtype='float64'))
+        for day, stats in day_stats(orders).items():
+            self.days[day] = [a + b for a, b in zip(self.days.get(day, [0, 0, 0]), stats)]
+        return self
+
+    def add_spend(self, ns: np.ndarray, mobiles: np.ndarray, amounts: np.ndarray):
+        """Add order spend given as (ns since epoch, mobile number, amount) arrays"""
+        if len(ns) == 0:
+            return
+        last = int(ns.max())
+        if self.last_order_ns is None or last > self.last_order_ns:
+            self.last_order_ns = last
+        keep = ns >= self._retain_from()
+        incoming = pd.Series(amounts[keep]).groupby(
+            [pd.Index(ns[keep] // HOUR_NS, name='hour'), pd.Index(mobiles[keep], name='mobile_number')]
+        ).sum()
+        self._add_hourly(incoming)
+
+    def _add_hourly(self, incoming: pd.Series):
+        if not self.hourly_spend.empty:
+            incoming = pd.concat([self.hourly_spend, incoming]).groupby(level=['hour', 'mobile_number']).sum()
+        hours = incoming.index.get_level_values('hour')
+        self.hourly_spend = incoming[hours >= self._retain_from() // HOUR_NS]
+
+    def _retain_from(self) -> int:
+        """First ns of the hour the current window starts in"""
+        cutoff = self.last_order_ns - self.window_days * DAY_NS
+        return cutoff - cutoff % HOUR_NS
+
+    def merge(self, other: 'KpiSketches') -> 'KpiSketches':
+        """Merge sketches built from another chunk or day into this one"""
+        self.monthly_orders.merge(other.monthly_orders)
+        self.customer_orders.merge(other.customer_orders)
+        if other.last_order_ns is not None and (self.last_order_ns is None or other.last_order_ns > self.last_order_ns):
+            self.last_order_ns = other.last_order_ns
+        if self.last_order_ns is not None:
+            self._add_hourly(other.hourly_spend)
+        for day, stats in other.days.items():
+            self.days[day] = [a + b for a, b in zip(self.days.get(day, [0, 0, 0]), stats)]
+        return self
+
+    # ----- Persistence -----
+
+    def save(self, path):
+        """Write the sketches as NumPy columns (atomically)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+        for name in ('monthly_orders', 'customer_orders'):
+            for key, values in getattr(self, name).to_arrays().items():
+                arrays[f"{name}_{key}"] = values
+        arrays['spend_hour'] = self.hourly_spend.index.get_level_values('hour').to_numpy(dtype='int64')
+        arrays['spend_mobile'] = self.hourly_spend.index.get_level_values('mobile_number').to_numpy(dtype=str)
+        arrays['spend_amount'] = self.hourly_spend.to_numpy(dtype='float64')
+        meta = {
+            'distinct_error': self.distinct_error,
+            'window_days': self.window_days,
+            'precision': self.monthly_orders.precision,
+            'hash_name': self.monthly_orders.hash_name,
+            'last_order_ns': self.last_order_ns,
+            'days': {str(day): stats for day, stats in self.days.items()},
+        }
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'wb') as f:
+            # Uncompressed: the file is rewritten on every run that adds orders
+            np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path) -> 'KpiSketches':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            sketches = cls(meta['distinct_error'], meta['window_days'])
+            for name in ('monthly_orders', 'customer_orders'):
+                arrays = {key: data[f"{name}_{key}"] for key in ('groups', 'group_codes', 'register', 'rank')}
+                setattr(sketches, name, GroupedHyperLogLog.from_arrays(meta['precision'], meta['hash_name'], arrays))
+            sketches.hourly_spend = pd.Series(data['spend_amount'], index=pd.MultiIndex.from_arrays(
+                [data['spend_hour'], data['spend_mobile'].astype(object)], names=['hour', 'mobile_number']
+            ))
+        sketches.last_order_ns = meta['last_order_ns']
+        sketches.days = {int(day): stats for day, stats in meta['days'].items()}
+        return sketches
+
+
+def build_sketches(
+    orders: pd.DataFrame,
+    tz: str,
+    distinct_error: float = 0.02,
+    window_days: int = 30,
+    chunk_size: int = 1_000_000,
+    sketches: KpiSketches = None
+) -> KpiSketches:
+    """Fold cleaned orders into `sketches` (new sketches by default), one chunk at a time"""
+    if sketches is None:
+        sketches = KpiSketches(distinct_error, window_days)
+    for start in range(0, len(orders), chunk_size):
+        sketches.update(orders.iloc[start:start + chunk_size], tz)
+    return sketches
+
+
+def sketch_path(sketch_dir, tz: str, distinct_error: float, window_days: int) -> Path:
+    """Sketch file for one timezone and sketch configuration"""
+    key = hashlib.sha1(f"{tz}|{distinct_error}|{window_days}".encode('utf-8')).hexdigest()[:12]
+    return Path(sketch_dir) / f"kpi_sketches-{key}.npz"
+
+
+def load_or_update_sketches(
+    orders: pd.DataFrame,
+    tz: str,
+    sketch_dir=None,
+    distinct_error: float = 0.02,
+    window_days: int = 30,
+    chunk_size: int = 1_000_000
+) -> KpiSketches:
+    """
+    Bring the persisted sketches up to date with `orders`
+
+    Orders are compared per UTC day with the days already folded in (see
+    day_stats): unchanged days are skipped and only new days' orders are
+    added. Distinct-count sketches cannot forget values, so if a day that
+    was already folded in has changed or is gone, the sketches are rebuilt
+    from all orders.
+    """
+    path = sketch_path(sketch_dir, tz, distinct_error, window_days) if sketch_dir else None
+    if path is None or not path.exists():
+        sketches = build_sketches(orders, tz, distinct_error, window_days, chunk_size)
+        if path is not None:
+            sketches.save(path)
+            log.info(f"Saved KPI sketches ({len(sketches.days)} days): {path}")
+        return sketches
+
+    sketches = KpiSketches.load(path)
+    current = day_stats(orders)
+    changed = [day for day, stats in sketches.days.items() if current.get(day) != stats]
+    if changed:
+        log.info(f"{len(changed)} sketched day(s) changed since {path} was saved; rebuilding sketches")
+        sketches = build_sketches(orders, tz, distinct_error, window_days, chunk_size)
+    else:
+        new_days = [day for day in current if day not in sketches.days]
+        if not new_days:
+            log.info(f"Reusing KPI sketches ({len(sketches.days)} days): {path}")
+            return sketches
+        new = np.isin(_epoch_ns(orders['order_date_time']) // DAY_NS, new_days)
+        log.info(f"Adding {int(new.sum())} orders from {len(new_days)} new day(s) to KPI sketches: {path}")
+        build_sketches(orders[new], tz, chunk_size=chunk_size, sketches=sketches)
+    sketches.save(path)
+    return sketches
+
+
+def get_repeat_customers_approx(sketches: KpiSketches, customers: pd.DataFrame = None) -> pd.DataFrame:
+    """Approximate customers with more than one order"""
+    counts = sketches.customer_orders.counts()
+    repeats = counts[counts > 1].rename_axis('mobile_number').reset_index(name='order_count')
+    repeats['mobile_number'] = repeats['mobile_number'].astype('string')
+    repeats['relative_error'] = sketches.customer_orders.relative_error
+
+    if customers is not None:
+        repeats = repeats.merge(customers, on='mobile_number', how='left')
+
+    return repeats.sort_values(['order_count', 'mobile_number'], ascending=[False, True]).reset_index(drop=True)
+
+
+def get_monthly_trends_approx(sketches: KpiSketches) -> pd.DataFrame:
+    """Approximate distinct orders per local month"""
+    counts = sketches.monthly_orders.counts()
+    trends = counts.rename_axis('order_month').reset_index(name='order_count')
+    trends['order_month'] = pd.to_datetime(trends['order_month'], format='%Y-%m')
+    trends['relative_error'] = sketches.monthly_orders.relative_error
+    return trends.sort_values('order_month').reset_index(drop=True)
+
+
+def get_top_spenders_last_30_days_approx(
+    sketches: KpiSketches,
+    customers: pd.DataFrame,
+    top_n: int = 10
+) -> pd.DataFrame:
+    """
+    Top spenders over the rolling `window_days` x 24h before the latest order
+
+    The window is the exact KPI's window. Spend in whole hours inside it is
+    exact; the hour the window starts in is only known as a whole, so each
+    customer's spend in that hour is reported as `max_error`: the exact
+    spend lies in [total_spend, total_spend + max_error]. Ranking is by
+    total_spend, so a customer whose boundary-hour spend would lift them
+    into the top N can be missing.
+    """
+    columns = ['mobile_number', 'total_spend', 'max_error', 'customer_id', 'customer_name', 'region']
+    if sketches.last_order_ns is None:
+        return pd.DataFrame(columns=columns)
+
+    cutoff = sketches.last_order_ns - sketches.window_days * DAY_NS
+    spend = sketches.hourly_spend
+    hours = spend.index.get_level_values('hour').to_numpy()
+    in_window = spend[hours * HOUR_NS >= cutoff].groupby(level='mobile_number').sum()
+    # Spend in the partially covered hour the window starts in, if any
+    boundary = spend[(hours == cutoff // HOUR_NS) & (cutoff % HOUR_NS != 0)].groupby(level='mobile_number').sum()
+
+    top = in_window.nlargest(top_n)
+    result = pd.DataFrame({
+        'mobile_number': pd.array(top.index, dtype='string'),
+        'total_spend': top.to_numpy(),
+        'max_error': boundary.reindex(top.index, fill_value=0.0).to_numpy(),
+    })
+    result = result.merge(customers, on='mobile_number', how='left')
+
+    return result.sort_values('total_spend', ascending=False).head(top_n).reset_index(drop=True)
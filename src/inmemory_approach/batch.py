@@ -0,0 +1,147 @@
+"""
+In-Memory Approach - Batch Processing
+Processes many order drops (a directory or glob of XML files) in one run:
+the customer dimension is loaded and cleaned once, its key index is shared
+read-only with worker processes through a memory-mapped file, each worker
+loads and validates one order file, and the per-file results are combined
+into consolidated KPIs
+"""
+import argparse
+import glob
+import logging
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.config import CONFIG
+from utils.dag import process_context
+from inmemory_approach.data_loader import load_customers, load_orders
+from inmemory_approach.validator import (
+    validate_customers,
+    validate_orders,
+    build_key_index,
+    write_quality_report
+)
+from inmemory_approach.kpi_calculator import (
+    get_repeat_customers,
+    get_monthly_trends,
+    get_regional_revenue,
+    get_top_spenders_last_30_days
+)
+from inmemory_approach.main import REPORT_FILES, save_report, display_results
+
+log = logging.getLogger('akasa')
+
+# Columns the consolidated KPIs need from each order file
+ORDER_COLUMNS = ['order_id', 'mobile_number', 'order_date_time', 'sku_count', 'total_amount']
+
+# Order files picked up from a directory (compressed drops are read in place)
+ORDER_FILE_PATTERNS = ('*.xml', '*.xml.gz', '*.xml.zst')
+
+
+def resolve_order_files(source) -> list:
+    """Expand a directory (all order XML files inside) or glob pattern into sorted file paths"""
+    path = Path(source)
+    if path.is_dir():
+        files = sorted(f for pattern in ORDER_FILE_PATTERNS for f in path.glob(pattern))
+    else:
+        files = sorted(Path(p) for p in glob.glob(str(source)))
+    return [str(f) for f in files]
+
+
+def _process_order_file(path: str, tz: str, key_index_path: str):
+    """Worker: load and validate one order file against the shared customer key index"""
+    key_index = np.load(key_index_path, mmap_mode='r')
+    result = validate_orders(load_orders(path), tz=tz, customer_index=key_index)
+    report = dict(result.report, source=path)
+    return path, result.clean[ORDER_COLUMNS], report
+
+
+def process_batch(customers_csv, order_files, tz, max_workers=4):
+    """
+    Load customers once and process order files in parallel worker processes
+
+    Returns:
+        (customers, orders, reports) where orders is the concatenation of all
+        files with cross-file duplicate order ids removed (first file wins)
+    """
+    customers_result = validate_customers(load_customers(customers_csv))
+    customers = customers_result.clean
+    log.info(f"Customers after cleaning: {len(customers)} rows (shared by {len(order_files)} order files)")
+
+    with tempfile.TemporaryDirectory(prefix='akasa-batch-') as tmp:
+        key_index_path = str(Path(tmp) / 'customer_keys.npy')
+        np.save(key_index_path, build_key_index(customers['mobile_number']))
+
+        results = {}
+        # Not forked: the logging listener thread may already be running
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=process_context()) as pool:
+            futures = [pool.submit(_process_order_file, path, tz, key_index_path) for path in order_files]
+            for future in futures:
+                path, frame, report = future.result()
+                results[path] = (frame, report)
+                log.info(f"Processed {path}: {report['rows_out']}/{report['rows_in']} orders kept")
+
+    frames = [results[path][0] for path in order_files]
+    reports = [customers_result.report] + [results[path][1] for path in order_files]
+    orders = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=ORDER_COLUMNS)
+
+    before = len(orders)
+    orders = orders.drop_duplicates(subset=['order_id'], keep='first').reset_index(drop=True)
+    if before > len(orders):
+        log.warning(f"Dropped {before - len(orders)} order ids repeated across files; keeping first file's copy")
+
+    return customers, orders, reports
+
+
+def calculate_batch_kpis(orders, customers, tz, top_n=10) -> dict:
+    """Consolidated KPIs over all processed order files"""
+    return {
+        'repeat_customers': get_repeat_customers(orders, customers),
+        'monthly_trends': get_monthly_trends(orders, tz=tz),
+        'regional_revenue': get_regional_revenue(orders, customers),
+        'top_spenders': get_top_spenders_last_30_days(orders, customers, tz=tz, top_n=top_n),
+    }
+
+
+def main():
+    """Batch pipeline execution over a directory or glob of order files"""
+    parser = argparse.ArgumentParser(description="Process many order drops with one customer load")
+    parser.add_argument('orders', help="Directory of order XML files or a glob pattern")
+    parser.add_argument('--customers', default=CONFIG['CUSTOMERS_CSV'], help="Customers CSV")
+    parser.add_argument('--workers', type=int, default=CONFIG['PIPELINE_WORKERS'])
+    parser.add_argument('--reports-dir', default=str(Path(CONFIG['REPORTS_DIR']) / 'batch'))
+    args = parser.parse_args()
+
+    order_files = resolve_order_files(args.orders)
+    if not order_files:
+        log.error(f"No order files match: {args.orders}")
+        sys.exit(1)
+    log.info(f"Starting Akasa Air - batch pipeline over {len(order_files)} order files")
+
+    try:
+        customers, orders, reports = process_batch(
+            args.customers, order_files, tz=CONFIG['TZ'], max_workers=args.workers
+        )
+    except Exception as e:
+        log.error(f"Batch processing failed: {e}", exc_info=True)
+        sys.exit(1)
+    log.info(f"Consolidated orders: {len(orders)} rows")
+
+    kpis = calculate_batch_kpis(orders, customers, tz=CONFIG['TZ'], top_n=CONFIG['TOP_N'])
+    for kpi, df in kpis.items():
+        save_report(df, args.reports_dir, REPORT_FILES[kpi])
+    write_quality_report(reports, args.reports_dir)
+
+    display_results(kpis)
+    log.info("Batch pipeline completed successfully")
+
+
+if __name__ == "__main__":
+    main()
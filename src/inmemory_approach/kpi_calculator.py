@@ -1,12 +1,122 @@
 """
 In-Memory Approach - KPI Calculations
-Calculate KPIs using pandas dataframes
+Calculate KPIs using pandas dataframes, or with the sort-based NumPy
+kernels in utils.kernels (backend='numpy')
 """
+from typing import NamedTuple, Optional
+
+import numpy as np
 import pandas as pd
 
+from utils.kernels import encode, group_sum, group_nunique, sorted_join
+
+BACKENDS = ('pandas', 'numpy')
+
+
+def _check_backend(backend):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown KPI backend '{backend}', expected one of {BACKENDS}")
+    return backend == 'numpy'
+
+
+class OrderKeys(NamedTuple):
+    """Integer codes of the string keys, shared by every NumPy-backend KPI"""
+    mobile: np.ndarray
+    customer: Optional[np.ndarray]
+    mobiles: pd.Index
+    order_id: np.ndarray
+
+
+def encode_keys(orders: pd.DataFrame, customers: pd.DataFrame = None) -> OrderKeys:
+    """
+    Encode mobile numbers (orders and customers in one code space) and
+    order ids once, so each KPI only runs integer kernels
+    """
+    if customers is None:
+        (mobile,), mobiles = encode(orders['mobile_number'])
+        customer = None
+    else:
+        (mobile, customer), mobiles = encode(orders['mobile_number'], customers['mobile_number'])
+    order_id, _ = pd.factorize(orders['order_id'])
+    return OrderKeys(mobile, customer, mobiles, order_id)
+
+
+def _attach_customers(frame: pd.DataFrame, codes, keys: OrderKeys, customers: pd.DataFrame) -> pd.DataFrame:
+    """Left join customer attributes onto a frame keyed by mobile codes"""
+    rows = sorted_join(codes, keys.customer)
+    lookup = customers.reset_index(drop=True)
+    for col in customers.columns:
+        if col != 'mobile_number':
+            frame[col] = lookup[col].reindex(rows).array
+    return frame
+
+
+def _repeat_customers_numpy(customers, keys: OrderKeys):
+    codes, counts = group_nunique(keys.mobile, keys.order_id)
+    repeat = (codes >= 0) & (counts > 1)
+    codes, counts = codes[repeat], counts[repeat]
+
+    # Order by count descending, then mobile number ascending
+    mobile_rank = np.empty(len(keys.mobiles), dtype='int64')
+    mobile_rank[keys.mobiles.argsort()] = np.arange(len(keys.mobiles))
+    order = np.lexsort((mobile_rank[codes], -counts))
+    codes, counts = codes[order], counts[order]
+
+    repeats = pd.DataFrame({'mobile_number': keys.mobiles.take(codes).array, 'order_count': counts})
+    if customers is not None:
+        repeats = _attach_customers(repeats, codes, keys, customers)
+    return repeats
+
 
-def get_repeat_customers(orders: pd.DataFrame, customers: pd.DataFrame = None) -> pd.DataFrame:
+def _monthly_trends_numpy(orders, tz, keys: OrderKeys):
+    local_ts = orders['order_date_time'].dt.tz_convert(tz).dt.tz_localize(None)
+    months = local_ts.to_numpy().astype('datetime64[M]').astype('int64')
+    codes, counts = group_nunique(months, keys.order_id)
+    return pd.DataFrame({
+        'order_month': codes.astype('datetime64[M]').astype(local_ts.dtype),
+        'order_count': counts,
+    })
+
+
+def _regional_revenue_numpy(orders, customers, keys: OrderKeys):
+    region_codes, regions = pd.factorize(customers['region'])
+    regions = list(regions)
+    if 'Unknown' not in regions:
+        regions.append('Unknown')
+    unknown = regions.index('Unknown')
+    region_codes = np.where(region_codes >= 0, region_codes, unknown)
+
+    # Aggregate per customer first so the join only touches one row per customer
+    mobile_codes, spend = group_sum(keys.mobile, orders['total_amount'].to_numpy(dtype='float64'))
+    rows = sorted_join(mobile_codes, keys.customer)
+    mobile_regions = np.where(rows >= 0, region_codes[np.maximum(rows, 0)], unknown)
+    codes, revenue = group_sum(mobile_regions, spend)
+    names = pd.array(np.asarray(regions, dtype=object)[codes], dtype=customers['region'].dtype)
+    return pd.DataFrame({'region': names, 'revenue': revenue})
+
+
+def _top_spenders_numpy(orders, recent, customers, top_n, keys: OrderKeys):
+    codes, spend = group_sum(keys.mobile[recent], orders['total_amount'].to_numpy(dtype='float64')[recent])
+    valid = codes >= 0
+    codes, spend = codes[valid], spend[valid]
+    top = np.argsort(-spend, kind='stable')[:top_n]
+    codes, spend = codes[top], spend[top]
+
+    result = pd.DataFrame({'mobile_number': keys.mobiles.take(codes).array, 'total_spend': spend})
+    return _attach_customers(result, codes, keys, customers)
+
+
+def get_repeat_customers(
+    orders: pd.DataFrame,
+    customers: pd.DataFrame = None,
+    backend: str = 'pandas',
+    keys: OrderKeys = None
+) -> pd.DataFrame:
     """Identify customers with more than one order"""
+    if _check_backend(backend):
+        keys = keys if keys is not None else encode_keys(orders, customers)
+        return _repeat_customers_numpy(customers, keys)
+
     counts = orders.groupby('mobile_number')['order_id'].nunique().reset_index(name='order_count')
     repeats = counts[counts['order_count'] > 1]
     
@@ -16,8 +126,17 @@ def get_repeat_customers(orders: pd.DataFrame, customers: pd.DataFrame = None) -
     return repeats.sort_values(['order_count', 'mobile_number'], ascending=[False, True]).reset_index(drop=True)
 
 
-def get_monthly_trends(orders: pd.DataFrame, tz: str) -> pd.DataFrame:
+def get_monthly_trends(
+    orders: pd.DataFrame,
+    tz: str,
+    backend: str = 'pandas',
+    keys: OrderKeys = None
+) -> pd.DataFrame:
     """Aggregate orders by month"""
+    if _check_backend(backend):
+        keys = keys if keys is not None else encode_keys(orders)
+        return _monthly_trends_numpy(orders, tz, keys)
+
     local_ts = orders['order_date_time'].dt.tz_convert(tz).dt.tz_localize(None)
     orders = orders.assign(order_month=local_ts.dt.to_period('M').dt.to_timestamp())
     
@@ -30,8 +149,18 @@ def get_monthly_trends(orders: pd.DataFrame, tz: str) -> pd.DataFrame:
     )
 
 
-def get_regional_revenue(orders: pd.DataFrame, customers: pd.DataFrame) -> pd.DataFrame:
+def get_regional_revenue(
+    orders: pd.DataFrame,
+    customers: pd.DataFrame,
+    backend: str = 'pandas',
+    keys: OrderKeys = None
+) -> pd.DataFrame:
     """Calculate total revenue by region"""
+    if _check_backend(backend):
+        keys = keys if keys is not None else encode_keys(orders, customers)
+        revenue = _regional_revenue_numpy(orders, customers, keys)
+        return revenue.sort_values('revenue', ascending=False).reset_index(drop=True)
+
     merged = orders.merge(customers[['mobile_number', 'region']], on='mobile_number', how='left')
     merged['region'] = merged['region'].fillna('Unknown')
     
@@ -44,21 +173,131 @@ def get_regional_revenue(orders: pd.DataFrame, customers: pd.DataFrame) -> pd.Da
     )
 
 
+def get_regional_monthly_revenue(orders: pd.DataFrame, customers: pd.DataFrame, tz: str) -> pd.DataFrame:
+    """Calculate revenue and orders by region and month"""
+    local_ts = orders['order_date_time'].dt.tz_convert(tz).dt.tz_localize(None)
+    merged = orders.assign(order_month=local_ts.dt.to_period('M').dt.to_timestamp()).merge(
+        customers[['mobile_number', 'region']], on='mobile_number', how='left'
+    )
+    merged['region'] = merged['region'].fillna('Unknown')
+    
+    return (
+        merged.groupby(['region', 'order_month'])
+        .agg(order_count=('order_id', 'nunique'), revenue=('total_amount', 'sum'))
+        .reset_index()
+        .sort_values(['order_month', 'revenue'], ascending=[True, False])
+        .reset_index(drop=True)
+    )
+
+
 def get_top_spenders_last_30_days(
     orders: pd.DataFrame,
     customers: pd.DataFrame,
     tz: str,
-    top_n: int = 10
+    top_n: int = 10,
+    days: int = 30,
+    backend: str = 'pandas',
+    keys: OrderKeys = None
 ) -> pd.DataFrame:
-    """Rank customers by spend in last 30 days"""
+    """Rank customers by spend in the last `days` days (rolling, from the latest order)"""
+    numpy_backend = _check_backend(backend)
     now_utc = orders['order_date_time'].max()
     if pd.isna(now_utc):
         return pd.DataFrame(columns=['mobile_number', 'total_spend', 'customer_id', 'customer_name', 'region'])
     
-    cutoff_utc = (now_utc.tz_convert(tz) - pd.Timedelta(days=30)).tz_convert('UTC')
+    cutoff_utc = (now_utc.tz_convert(tz) - pd.Timedelta(days=days)).tz_convert('UTC')
+    if numpy_backend:
+        recent = (orders['order_date_time'] >= cutoff_utc).to_numpy()
+        keys = keys if keys is not None else encode_keys(orders, customers)
+        return _top_spenders_numpy(orders, recent, customers, top_n, keys)
     recent = orders[orders['order_date_time'] >= cutoff_utc]
     
     spend = recent.groupby('mobile_number')['total_amount'].sum().reset_index(name='total_spend')
     result = spend.merge(customers, on='mobile_number', how='left')
     
     return result.sort_values('total_spend', ascending=False).head(top_n).reset_index(drop=True)
+
+
+def get_top_spenders_by_window(
+    orders: pd.DataFrame,
+    customers: pd.DataFrame,
+    windows=(7, 30, 90, 365),
+    timezones=('Asia/Kolkata',),
+    top_n: int = 10
+) -> dict:
+    """
+    Rank customers by spend for every (window_days, timezone) pair in one pass
+
+    A window of N days covers the N local calendar days ending on the local
+    day of the latest order. Spend is aggregated once per customer and
+    15-minute UTC bucket (every timezone offset is a multiple of 15 minutes,
+    so local midnights fall on bucket boundaries), prefix-summed per customer,
+    and each window is answered by a searchsorted lookup of its cutoff.
+    Calendar-day windows differ from the rolling 30 x 24h window of
+    get_top_spenders_last_30_days. Spend is rounded to cents, since prefix
+    sum differences carry float noise.
+
+    Returns:
+        {(window_days, timezone): leaderboard DataFrame}
+    """
+    columns = ['mobile_number', 'total_spend', 'customer_id', 'customer_name', 'region']
+    pairs = [(int(days), tz) for tz in timezones for days in windows]
+    last_utc = orders['order_date_time'].max()
+    if pd.isna(last_utc):
+        return {pair: pd.DataFrame(columns=columns) for pair in pairs}
+
+    bucket_size = pd.Timedelta(minutes=15)
+    epoch = pd.Timestamp('1970-01-01', tz='UTC')
+    codes, mobiles = pd.factorize(orders['mobile_number'])
+    buckets = ((orders['order_date_time'] - epoch) // bucket_size).to_numpy(dtype='int64')
+
+    # Per-customer spend and order counts per bucket, sorted by (customer, bucket)
+    grouped = (
+        pd.DataFrame({'code': codes, 'bucket': buckets,
+                      'spend': orders['total_amount'].to_numpy(), 'orders': 1})
+        .groupby(['code', 'bucket'], sort=True)[['spend', 'orders']]
+        .sum()
+    )
+    code = grouped.index.get_level_values('code').to_numpy()
+    bucket = grouped.index.get_level_values('bucket').to_numpy()
+    cum_spend = grouped['spend'].groupby(level='code').cumsum().to_numpy()
+    cum_orders = grouped['orders'].groupby(level='code').cumsum().to_numpy()
+
+    # Last prefix value per customer = all-time totals
+    last = np.r_[code[1:] != code[:-1], True]
+    total_spend = np.zeros(len(mobiles))
+    total_orders = np.zeros(len(mobiles), dtype='int64')
+    total_spend[code[last]] = cum_spend[last]
+    total_orders[code[last]] = cum_orders[last]
+
+    lo = bucket.min()
+    span = bucket.max() - lo + 2
+    keys = code * span + (bucket - lo)
+    all_codes = np.arange(len(mobiles))
+
+    leaderboards = {}
+    for days, tz in pairs:
+        last_local_day = last_utc.tz_convert(tz).tz_localize(None).normalize()
+        start_local = (last_local_day - pd.Timedelta(days=days - 1)).tz_localize(
+            tz, ambiguous=False, nonexistent='shift_forward'
+        )
+        cutoff = (start_local.tz_convert('UTC') - epoch) // bucket_size
+        cutoff = min(max(cutoff - lo, 0), span - 1)
+
+        # Prefix totals strictly before the cutoff bucket, per customer
+        pos = np.searchsorted(keys, all_codes * span + cutoff, side='left') - 1
+        valid = (pos >= 0) & (code[np.maximum(pos, 0)] == all_codes)
+        spend_before = np.where(valid, cum_spend[np.maximum(pos, 0)], 0.0)
+        orders_before = np.where(valid, cum_orders[np.maximum(pos, 0)], 0)
+
+        in_window = (total_orders - orders_before) > 0
+        spend = pd.DataFrame({
+            'mobile_number': mobiles[in_window],
+            'total_spend': np.round((total_spend - spend_before)[in_window], 2),
+        })
+        result = spend.merge(customers, on='mobile_number', how='left')
+        leaderboards[(days, tz)] = (
+            result.sort_values('total_spend', ascending=False).head(top_n).reset_index(drop=True)
+        )
+
+    return leaderboards
@@ -0,0 +1,298 @@
+"""
+In-Memory Approach - KPI Aggregate Cube
+Materializes orders and spend per customer, local day and rolling-day
+offset once per data version, stores the cells as compact integer/float
+columns, and answers the KPIs by slicing and rolling up the cube instead
+of rescanning orders
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger('akasa')
+
+# Dimensions a rollup can group by
+DIMENSIONS = ('mobile_number', 'region', 'month', 'day')
+MEASURES = ('orders', 'spend')
+
+
+def _as_list(value):
+    return list(value) if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)) else [value]
+
+
+class KpiCube:
+    """
+    Region x month x customer aggregate of cleaned orders
+
+    Each cell holds the order count and spend of one customer on one local
+    day, split by `days_ago` (whole 24h periods before the latest order,
+    rounded up) so rolling "last N days" windows are exact lookups. Region
+    is an attribute of the customer dimension and month derives from day.
+    """
+
+    def __init__(self, customers, regions, customer_region, cells, tz, reference, orders_report=None):
+        self.customers = customers
+        self.regions = regions
+        self.customer_region = customer_region
+        self.cells = cells
+        self.tz = tz
+        self.reference = reference
+        # Validation report of the orders the cube was built from
+        self.orders_report = orders_report
+
+    @classmethod
+    def from_cells(cls, cells: pd.DataFrame, customers: pd.DataFrame, tz: str, reference) -> 'KpiCube':
+        """
+        Build a cube from pre-aggregated cells
+
+        Args:
+            cells: Columns mobile_number, order_day (local date), days_ago,
+                orders, spend
+            customers: Customer dimension (unique mobile numbers)
+            reference: Timestamp of the latest order
+        """
+        dims = customers.drop_duplicates('mobile_number').reset_index(drop=True)
+        mobiles = cells['mobile_number'].astype('string')
+        orphans = pd.Index(mobiles.unique()).difference(pd.Index(dims['mobile_number'].astype('string')))
+        if len(orphans):
+            dims = pd.concat([dims, pd.DataFrame({'mobile_number': orphans})], ignore_index=True)
+        dims['mobile_number'] = dims['mobile_number'].astype('string')
+
+        customer_region, regions = pd.factorize(dims['region'].fillna('Unknown'))
+        days = pd.to_datetime(cells['order_day']).to_numpy().astype('datetime64[D]').astype('int32')
+        columns = {
+            'customer': pd.Index(dims['mobile_number']).get_indexer(mobiles).astype('int32'),
+            'day': days,
+            'days_ago': cells['days_ago'].to_numpy(dtype='int32'),
+            'orders': cells['orders'].to_numpy(dtype='int64'),
+            'spend': cells['spend'].to_numpy(dtype='float64'),
+        }
+        reference = pd.Timestamp(reference)
+        if reference is not pd.NaT and reference.tzinfo is None:
+            reference = reference.tz_localize(tz)
+        return cls(dims, np.asarray(regions, dtype=str), customer_region.astype('int16'), columns, tz, reference)
+
+    def __len__(self):
+        return len(self.cells['orders'])
+
+    # ----- Query API -----
+
+    def slice(self, region=None, month=None, mobile_number=None, days=None, start=None, end=None) -> 'KpiCube':
+        """
+        Restrict the cube to matching cells
+
+        Args:
+            region: Region name or list of names
+            month: Month ('YYYY-MM' or Timestamp) or list of months
+            mobile_number: Mobile number or list of numbers
+            days: Rolling window, cells within `days` x 24h of the latest order
+            start, end: Inclusive local-date bounds
+        """
+        c = self.cells
+        keep = np.ones(len(self), dtype=bool)
+        if region is not None:
+            codes = np.flatnonzero(np.isin(self.regions, _as_list(region)))
+            keep &= np.isin(self.customer_region[c['customer']], codes)
+        if month is not None:
+            months = pd.PeriodIndex([pd.Period(m, freq='M') for m in _as_list(month)])
+            wanted = months.to_timestamp().to_numpy().astype('datetime64[M]')
+            keep &= np.isin(self._months(), wanted)
+        if mobile_number is not None:
+            index = pd.Index(self.customers['mobile_number'])
+            codes = index.get_indexer(pd.Index(_as_list(mobile_number), dtype='string'))
+            keep &= np.isin(c['customer'], codes[codes >= 0])
+        if days is not None:
+            keep &= c['days_ago'] <= int(days)
+        if start is not None:
+            keep &= c['day'] >= np.datetime64(pd.Timestamp(start).date(), 'D').astype('int32')
+        if end is not None:
+            keep &= c['day'] <= np.datetime64(pd.Timestamp(end).date(), 'D').astype('int32')
+        cells = {name: values[keep] for name, values in c.items()}
+        return KpiCube(self.customers, self.regions, self.customer_region, cells, self.tz, self.reference)
+
+    def _months(self) -> np.ndarray:
+        return self.cells['day'].astype('datetime64[D]').astype('datetime64[M]')
+
+    def _dimension(self, name) -> pd.Series:
+        c = self.cells
+        if name == 'mobile_number':
+            return pd.Series(c['customer'])
+        if name == 'region':
+            return pd.Series(self.customer_region[c['customer']])
+        if name == 'month':
+            return pd.Series(self._months().astype('datetime64[ns]'))
+        if name == 'day':
+            return pd.Series(c['day'].astype('datetime64[D]').astype('datetime64[ns]'))
+        raise ValueError(f"Unknown dimension '{name}', expected one of {DIMENSIONS}")
+
+    def rollup(self, by=(), measures=MEASURES) -> pd.DataFrame:
+        """
+        Aggregate measures over the given dimensions
+
+        Returns:
+            DataFrame with one column per dimension in `by` plus the measures
+        """
+        by = _as_list(by) if by else []
+        measures = _as_list(measures)
+        values = pd.DataFrame({m: self.cells[m] for m in measures})
+        if not by:
+            return values.sum().to_frame().T.astype({'orders': 'int64'} if 'orders' in measures else {})
+
+        keys = [self._dimension(name).rename(name) for name in by]
+        out = values.groupby(keys, sort=True).sum().reset_index()
+        if 'mobile_number' in by:
+            out['mobile_number'] = self.customers['mobile_number'].array[out['mobile_number'].to_numpy()]
+        if 'region' in by:
+            out['region'] = self.regions[out['region']]
+        return out
+
+    def top_k(self, k, by='mobile_number', measure='spend') -> pd.DataFrame:
+        """Largest `measure` totals per `by` value"""
+        return (
+            self.rollup(by, [measure])
+            .sort_values(measure, ascending=False)
+            .head(k)
+            .reset_index(drop=True)
+        )
+
+    def with_customers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Attach customer attributes to a frame keyed by mobile_number"""
+        return df.merge(self.customers, on='mobile_number', how='left')
+
+    # ----- Persistence -----
+
+    def save(self, path):
+        """Write the cube as compressed NumPy columns"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"cell_{name}": values for name, values in self.cells.items()}
+        for col in self.customers.columns:
+            values = self.customers[col].astype('string')
+            arrays[f"dim_{col}"] = values.fillna('').to_numpy(dtype=str)
+            arrays[f"dim_{col}_na"] = values.isna().to_numpy(dtype=bool)
+        meta = {
+            'tz': self.tz,
+            'reference': None if pd.isna(self.reference) else self.reference.isoformat(),
+            'customer_columns': list(self.customers.columns),
+            'orders_report': self.orders_report,
+        }
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f, regions=self.regions, customer_region=self.customer_region,
+                meta=np.array(json.dumps(meta)), **arrays
+            )
+        log.info(f"Saved KPI cube ({len(self)} cells): {path}")
+
+    @classmethod
+    def load(cls, path) -> 'KpiCube':
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            customers = pd.DataFrame({
+                col: pd.array(data[f"dim_{col}"], dtype='string') for col in meta['customer_columns']
+            })
+            for col in meta['customer_columns']:
+                customers.loc[data[f"dim_{col}_na"], col] = pd.NA
+            cells = {name[len('cell_'):]: data[name] for name in data.files if name.startswith('cell_')}
+            reference = pd.Timestamp(meta['reference']) if meta['reference'] else pd.NaT
+            return cls(
+                customers, data['regions'], data['customer_region'], cells, meta['tz'], reference,
+                orders_report=meta.get('orders_report')
+            )
+
+
+def build_cube(orders: pd.DataFrame, customers: pd.DataFrame, tz: str) -> KpiCube:
+    """Aggregate cleaned orders (unique order ids, UTC timestamps) into a cube"""
+    reference = orders['order_date_time'].max()
+    local_day = orders['order_date_time'].dt.tz_convert(tz).dt.tz_localize(None).dt.normalize()
+    age = (reference - orders['order_date_time']) / pd.Timedelta(days=1)
+    cells = (
+        pd.DataFrame({
+            'mobile_number': orders['mobile_number'].astype('string'),
+            'order_day': local_day,
+            'days_ago': np.ceil(age.to_numpy()).astype('int64'),
+            'spend': orders['total_amount'].to_numpy(dtype='float64'),
+        })
+        .groupby(['mobile_number', 'order_day', 'days_ago'], sort=False)['spend']
+        .agg(orders='size', spend='sum')
+        .reset_index()
+    )
+    return KpiCube.from_cells(cells, customers, tz, reference)
+
+
+def cube_path(cube_dir, fingerprint: str, tz: str) -> Path:
+    """Cube file for one data version and timezone"""
+    key = hashlib.sha1(f"{fingerprint}|{tz}".encode('utf-8')).hexdigest()[:12]
+    return Path(cube_dir) / f"kpi_cube-{key}.npz"
+
+
+def load_or_build_cube(orders, customers, tz, cube_dir=None, fingerprint='', orders_report=None) -> KpiCube:
+    """Reuse the cube materialized for this data version, building it if needed"""
+    path = cube_path(cube_dir, fingerprint, tz) if cube_dir else None
+    if path is not None and path.exists():
+        log.info(f"Reusing KPI cube: {path}")
+        return KpiCube.load(path)
+    cube = build_cube(orders, customers, tz)
+    cube.orders_report = orders_report
+    if path is not None:
+        cube.save(path)
+    return cube
+
+
+def get_repeat_customers_cube(cube: KpiCube) -> pd.DataFrame:
+    """Customers with more than one order"""
+    counts = cube.rollup('mobile_number', 'orders').rename(columns={'orders': 'order_count'})
+    repeats = cube.with_customers(counts[counts['order_count'] > 1])
+    return repeats.sort_values(['order_count', 'mobile_number'], ascending=[False, True]).reset_index(drop=True)
+
+
+def get_monthly_trends_cube(cube: KpiCube) -> pd.DataFrame:
+    """Orders per local month"""
+    return cube.rollup('month', 'orders').rename(columns={'month': 'order_month', 'orders': 'order_count'})
+
+
+def get_regional_revenue_cube(cube: KpiCube) -> pd.DataFrame:
+    """Total revenue by region"""
+    return cube.top_k(len(cube.regions), 'region', 'spend').rename(columns={'spend': 'revenue'})
+
+
+def get_regional_monthly_revenue_cube(cube: KpiCube) -> pd.DataFrame:
+    """Revenue and orders by region and local month"""
+    return (
+        cube.rollup(['region', 'month'])
+        .rename(columns={'month': 'order_month', 'orders': 'order_count', 'spend': 'revenue'})
+        .sort_values(['order_month', 'revenue'], ascending=[True, False])
+        .reset_index(drop=True)
+    )
+
+
+def get_top_spenders_last_30_days_cube(cube: KpiCube, top_n: int = 10, days: int = 30) -> pd.DataFrame:
+    """Rank customers by spend in the last `days` days (rolling, from the latest order)"""
+    spend = cube.slice(days=days).top_k(top_n, 'mobile_number', 'spend')
+    return cube.with_customers(spend.rename(columns={'spend': 'total_spend'}))
+
+
+def get_top_spenders_by_window_cube(cube: KpiCube, windows=(7, 30, 90, 365), top_n: int = 10) -> dict:
+    """
+    Calendar-day window leaderboards in the cube's timezone
+
+    Same windows as kpi_calculator.get_top_spenders_by_window: N local days
+    ending on the local day of the latest order.
+
+    Returns:
+        {(window_days, cube.tz): leaderboard DataFrame}
+    """
+    columns = ['mobile_number', 'total_spend'] + [c for c in cube.customers.columns if c != 'mobile_number']
+    if pd.isna(cube.reference):
+        return {(int(days), cube.tz): pd.DataFrame(columns=columns) for days in windows}
+    last_day = cube.reference.tz_convert(cube.tz).tz_localize(None).normalize()
+    leaderboards = {}
+    for days in windows:
+        spend = cube.slice(start=last_day - pd.Timedelta(days=int(days) - 1)).rollup('mobile_number', 'spend')
+        spend['spend'] = spend['spend'].round(2)
+        spend = spend.sort_values('spend', ascending=False).head(top_n).reset_index(drop=True)
+        leaderboards[(int(days), cube.tz)] = cube.with_customers(spend.rename(columns={'spend': 'total_spend'}))
+    return leaderboards
@@ -1,5 +1,7 @@
 
+import json
 import sys
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
@@ -9,16 +11,57 @@ sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 from utils.config import CONFIG
 from utils.logger import setup_logger
-from inmemory_approach.data_loader import load_customers, load_orders, clean_customers, clean_orders
+from utils.dag import StageDAG, StageError
+from utils.sketches import HyperLogLog
+from utils.snapshot_store import snapshot_run
+from utils.streams import input_fingerprint
+from inmemory_approach.data_loader import load_customers, load_orders
+from inmemory_approach.validator import validate_customers, validate_orders, build_key_index, write_quality_report
 from inmemory_approach.kpi_calculator import (
     get_repeat_customers,
     get_monthly_trends,
     get_regional_revenue,
-    get_top_spenders_last_30_days
+    get_regional_monthly_revenue,
+    get_top_spenders_last_30_days,
+    get_top_spenders_by_window,
+    encode_keys
+)
+from inmemory_approach.kpi_cube import (
+    cube_path,
+    load_or_build_cube,
+    get_repeat_customers_cube,
+    get_monthly_trends_cube,
+    get_regional_revenue_cube,
+    get_regional_monthly_revenue_cube,
+    get_top_spenders_last_30_days_cube,
+    get_top_spenders_by_window_cube
+)
+from inmemory_approach.approx_kpi import (
+    load_or_update_sketches,
+    get_repeat_customers_approx,
+    get_monthly_trends_approx,
+    get_top_spenders_last_30_days_approx
 )
 
 log = setup_logger('akasa')
 
+REPORT_FILES = {
+    'repeat_customers': 'kpi_repeat_customers.csv',
+    'monthly_trends': 'kpi_monthly_trends.csv',
+    'regional_revenue': 'kpi_regional_revenue.csv',
+    'regional_monthly_revenue': 'kpi_regional_monthly_revenue.csv',
+    'top_spenders': 'kpi_top_spenders_last_30_days.csv',
+    'spend_leaderboards': 'kpi_top_spenders_by_window.csv',
+}
+
+
+# Settings that change how or where a run executes, not what its stages return
+RUNTIME_CONFIG_KEYS = {
+    'ENGINE', 'ENGINE_COST_MODEL', 'LOG_ASYNC', 'LOG_MAX_BYTES', 'LOG_BACKUP_COUNT',
+    'LOG_ROTATE_WHEN', 'PIPELINE_WORKERS', 'CHECKPOINT_DIR', 'CUBE_DIR', 'APPROX_SKETCH_DIR',
+    'SNAPSHOTS', 'SNAPSHOT_DIR', 'SNAPSHOT_COMPACT_DAYS',
+}
+
 
 def ensure_dir(path: Path):
     """Create directory if it doesn't exist"""
@@ -33,45 +76,188 @@ def save_report(df: pd.DataFrame, reports_dir: str, filename: str):
     log.info(f"Saved report: {outpath}")
 
 
-def main():
-    """Main pipeline execution"""
-    log.info("Starting Akasa Air - In-memory (pandas) pipeline")
-    
+def config_fingerprint(config) -> str:
+    """
+    Identify the settings that shape stage outputs
+
+    Every key counts except those listed in RUNTIME_CONFIG_KEYS, so a new
+    setting invalidates checkpoints by default rather than resuming stale ones.
+    """
+    return json.dumps(
+        {key: value for key, value in config.items() if key not in RUNTIME_CONFIG_KEYS},
+        sort_keys=True, default=str
+    )
+
+
+def _combine_leaderboards(leaderboards: dict) -> pd.DataFrame:
+    """
+    Stack per-(window, timezone) leaderboards into one report
+
+    Windows are whole local calendar days, hence `calendar_days` rather
+    than the rolling 30 x 24h window of kpi_top_spenders_last_30_days.csv
+    """
+    if not leaderboards:
+        return pd.DataFrame()
+    return pd.concat(
+        [
+            board.assign(calendar_days=days, timezone=tz, rank=range(1, len(board) + 1))
+            for (days, tz), board in leaderboards.items()
+        ],
+        ignore_index=True
+    )
+
+
+def _log_cleaned(name, df):
+    log.info(f"{name} after cleaning: {len(df)} rows")
+    return df
+
+
+def build_pipeline(config=CONFIG) -> StageDAG:
+    """
+    Build the pipeline stage graph
+
+    Customer and order branches load and clean independently; the KPIs only
+    depend on the cleaned frames, and each report write only on its KPI.
+    """
+    tz = config['TZ']
+    top_n = config['TOP_N']
+    reports_dir = config['REPORTS_DIR']
+    fingerprint = input_fingerprint(config['CUSTOMERS_CSV'], config['ORDERS_XML'])
+    dag = StageDAG(
+        'inmemory',
+        checkpoint_dir=config['CHECKPOINT_DIR'],
+        # Checkpoints are only reused for the same inputs and the same settings
+        fingerprint=f"{fingerprint}|{config_fingerprint(config)}",
+        max_workers=config['PIPELINE_WORKERS']
+    )
+
+    # A cube already materialized for this data version answers every KPI, so
+    # the orders are not loaded again; quarantined order rows and leaderboards
+    # in timezones other than TZ still need them
+    cube_file = cube_path(config['CUBE_DIR'], fingerprint, tz) if config['KPI_CUBE'] else None
+    cube_hit = (
+        cube_file is not None and cube_file.exists()
+        and not config['QUARANTINE'] and set(config['SPEND_TIMEZONES']) <= {tz}
+    )
+
     # 1. Load raw data
-    try:
-        customers_raw = load_customers(CONFIG['CUSTOMERS_CSV'])
-        orders_raw = load_orders(CONFIG['ORDERS_XML'])
-    except FileNotFoundError as e:
-        log.error(f"File not found: {e}")
-        sys.exit(1)
-    except Exception as e:
-        log.error(f"Error loading data: {e}")
-        sys.exit(1)
-    
-    # 2. Clean and validate
-    customers = clean_customers(customers_raw)
-    orders = clean_orders(orders_raw, tz=CONFIG['TZ'])
-    
-    log.info(f"Customers after cleaning: {len(customers)} rows")
-    log.info(f"Orders after cleaning: {len(orders)} rows")
-    
+    dag.add('load_customers', partial(load_customers, config['CUSTOMERS_CSV']), checkpoint=False)
+    if not cube_hit:
+        # XML parsing is CPU-bound and holds the GIL, so it gets its own process
+        dag.add('load_orders', partial(load_orders, config['ORDERS_XML']), executor='process', checkpoint=False)
+
+    # 2. Clean and validate (orders check mobile numbers against cleaned customers)
+    dag.add('validate_customers', validate_customers, deps=['load_customers'])
+    dag.add('clean_customers', lambda result: _log_cleaned('Customers', result.clean),
+            deps=['validate_customers'])
+    if cube_hit:
+        log.info(f"Orders already aggregated in {cube_file}; skipping order loading")
+        dag.add('kpi_cube', partial(load_or_build_cube, None, None, tz, config['CUBE_DIR'], fingerprint),
+                checkpoint=False)
+        # The orders report was stored with the cube when it was built
+        dag.add('quality_report', lambda customers, cube: write_quality_report(
+            [customers.report] + ([cube.orders_report] if cube.orders_report else []), reports_dir
+        ), deps=['validate_customers', 'kpi_cube'], checkpoint=False)
+    else:
+        dag.add('validate_orders', lambda raw, customers: validate_orders(
+            raw, tz=tz, customer_index=build_key_index(customers['mobile_number'])
+        ), deps=['load_orders', 'clean_customers'])
+        dag.add('clean_orders', lambda result: _log_cleaned('Orders', result.clean),
+                deps=['validate_orders'])
+        dag.add('quality_report', lambda customers, orders: write_quality_report(
+            [customers.report, orders.report], reports_dir,
+            quarantine={'customers': customers.quarantine, 'orders': orders.quarantine}
+            if config['QUARANTINE'] else None
+        ), deps=['validate_customers', 'validate_orders'], checkpoint=False)
+
     # 3. Calculate KPIs
-    log.info("Calculating KPIs...")
-    repeat_customers = get_repeat_customers(orders, customers)
-    monthly_trends = get_monthly_trends(orders, tz=CONFIG['TZ'])
-    regional_revenue = get_regional_revenue(orders, customers)
-    top_spenders = get_top_spenders_last_30_days(
-        orders, customers, tz=CONFIG['TZ'], top_n=CONFIG['TOP_N']
-    )
-    
+    if config['KPI_CUBE']:
+        # One aggregation per data version; every KPI is a slice/rollup of it
+        if not cube_hit:
+            dag.add('kpi_cube', lambda orders, customers, result: load_or_build_cube(
+                orders, customers, tz, config['CUBE_DIR'], fingerprint, orders_report=result.report
+            ), deps=['clean_orders', 'clean_customers', 'validate_orders'], checkpoint=False)
+        dag.add('repeat_customers', get_repeat_customers_cube, deps=['kpi_cube'])
+        dag.add('monthly_trends', get_monthly_trends_cube, deps=['kpi_cube'])
+        dag.add('regional_revenue', get_regional_revenue_cube, deps=['kpi_cube'])
+        dag.add('regional_monthly_revenue', get_regional_monthly_revenue_cube, deps=['kpi_cube'])
+        dag.add('top_spenders', partial(get_top_spenders_last_30_days_cube, top_n=top_n),
+                deps=['kpi_cube'])
+    else:
+        numpy_backend = config['KPI_BACKEND'] == 'numpy'
+        if numpy_backend:
+            # String keys are integer-coded once and shared by every kernel
+            dag.add('order_keys', encode_keys, deps=['clean_orders', 'clean_customers'], checkpoint=False)
+            dag.add('regional_revenue', lambda orders, customers, keys: get_regional_revenue(
+                orders, customers, backend='numpy', keys=keys
+            ), deps=['clean_orders', 'clean_customers', 'order_keys'])
+        else:
+            dag.add('regional_revenue', get_regional_revenue, deps=['clean_orders', 'clean_customers'])
+        dag.add('regional_monthly_revenue', partial(get_regional_monthly_revenue, tz=tz),
+                deps=['clean_orders', 'clean_customers'])
+
+        if config['APPROX_KPIS']:
+            # Persisted between runs; only days not yet sketched are folded in
+            dag.add('sketches', partial(
+                load_or_update_sketches, tz=tz,
+                sketch_dir=config['APPROX_SKETCH_DIR'],
+                distinct_error=config['APPROX_DISTINCT_ERROR']
+            ), deps=['clean_orders'], checkpoint=False)
+            dag.add('repeat_customers', get_repeat_customers_approx, deps=['sketches', 'clean_customers'])
+            dag.add('monthly_trends', get_monthly_trends_approx, deps=['sketches'])
+            dag.add('top_spenders', partial(get_top_spenders_last_30_days_approx, top_n=top_n),
+                    deps=['sketches', 'clean_customers'])
+            distinct_error = HyperLogLog.from_error(config['APPROX_DISTINCT_ERROR']).relative_error
+            log.info(
+                f"Approximate KPIs: distinct counts ±{distinct_error:.2%} (1 std. error); "
+                f"top spenders exact up to the window's first hour (max_error)"
+            )
+        elif numpy_backend:
+            dag.add('repeat_customers', lambda orders, customers, keys: get_repeat_customers(
+                orders, customers, backend='numpy', keys=keys
+            ), deps=['clean_orders', 'clean_customers', 'order_keys'])
+            dag.add('monthly_trends', lambda orders, keys: get_monthly_trends(
+                orders, tz, backend='numpy', keys=keys
+            ), deps=['clean_orders', 'order_keys'])
+            dag.add('top_spenders', lambda orders, customers, keys: get_top_spenders_last_30_days(
+                orders, customers, tz, top_n, backend='numpy', keys=keys
+            ), deps=['clean_orders', 'clean_customers', 'order_keys'])
+        else:
+            dag.add('repeat_customers', get_repeat_customers, deps=['clean_orders', 'clean_customers'])
+            dag.add('monthly_trends', partial(get_monthly_trends, tz=tz), deps=['clean_orders'])
+            dag.add('top_spenders', partial(get_top_spenders_last_30_days, tz=tz, top_n=top_n),
+                    deps=['clean_orders', 'clean_customers'])
+    if cube_hit:
+        dag.add('spend_leaderboards', lambda cube: _combine_leaderboards(
+            get_top_spenders_by_window_cube(cube, windows=config['SPEND_WINDOWS'], top_n=top_n)
+        ), deps=['kpi_cube'])
+    else:
+        dag.add('spend_leaderboards', lambda orders, customers: _combine_leaderboards(
+            get_top_spenders_by_window(
+                orders, customers,
+                windows=config['SPEND_WINDOWS'],
+                timezones=config['SPEND_TIMEZONES'],
+                top_n=top_n
+            )
+        ), deps=['clean_orders', 'clean_customers'])
+
     # 4. Save reports
-    log.info("Saving reports...")
-    save_report(repeat_customers, CONFIG['REPORTS_DIR'], 'kpi_repeat_customers.csv')
-    save_report(monthly_trends, CONFIG['REPORTS_DIR'], 'kpi_monthly_trends.csv')
-    save_report(regional_revenue, CONFIG['REPORTS_DIR'], 'kpi_regional_revenue.csv')
-    save_report(top_spenders, CONFIG['REPORTS_DIR'], 'kpi_top_spenders_last_30_days.csv')
-    
-    # 5. Display results
+    for kpi, filename in REPORT_FILES.items():
+        dag.add(f"save_{kpi}", partial(save_report, reports_dir=reports_dir, filename=filename),
+                deps=[kpi], checkpoint=False)
+
+    # 5. Append this run's KPIs to the snapshot history
+    if config['SNAPSHOTS']:
+        dag.add('save_snapshot', lambda *frames: snapshot_run(
+            dict(zip(REPORT_FILES, frames)), fingerprint, 'inmemory',
+            config['SNAPSHOT_DIR'], compact_days=config['SNAPSHOT_COMPACT_DAYS']
+        ), deps=list(REPORT_FILES), checkpoint=False)
+
+    return dag
+
+
+def display_results(outputs: dict):
+    """Display KPI results in console"""
     pd.set_option('display.width', 120)
     pd.set_option('display.max_columns', 20)
     
@@ -80,18 +266,35 @@ def main():
     print("=" * 80)
     
     print("\n--- Repeat Customers ---")
-    print(repeat_customers.to_string(index=False))
+    print(outputs['repeat_customers'].to_string(index=False))
     
     print("\n--- Monthly Order Trends ---")
-    print(monthly_trends.to_string(index=False))
+    print(outputs['monthly_trends'].to_string(index=False))
     
     print("\n--- Regional Revenue ---")
-    print(regional_revenue.to_string(index=False))
+    print(outputs['regional_revenue'].to_string(index=False))
     
     print("\n--- Top Spenders (Last 30 Days) ---")
-    print(top_spenders.to_string(index=False))
+    print(outputs['top_spenders'].to_string(index=False))
     
     print("\n" + "=" * 80)
+
+
+def main():
+    """Main pipeline execution"""
+    log.info("Starting Akasa Air - In-memory (pandas) pipeline")
+    
+    try:
+        outputs = build_pipeline().run()
+    except StageError as e:
+        if isinstance(e.error, FileNotFoundError):
+            log.error(f"File not found: {e.error}")
+        else:
+            log.error(f"Pipeline failed: {e}")
+        sys.exit(1)
+    
+    # 6. Display results
+    display_results(outputs)
     log.info("Pipeline completed successfully")
 
 
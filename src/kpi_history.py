@@ -0,0 +1,80 @@
+"""
+KPI History
+Command-line queries over the KPI snapshot store: list stored runs, print
+a KPI column as a time series across runs, and compact old partitions
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from utils.config import CONFIG
+from utils.logger import setup_logger
+from utils.snapshot_store import SnapshotStore
+
+logger = setup_logger('akasa')
+
+
+def _filters(args) -> dict:
+    return {'start': args.start, 'end': args.end, 'last': args.last, 'engine': args.engine}
+
+
+def main(argv=None):
+    """Query or compact the KPI snapshot store"""
+    parser = argparse.ArgumentParser(description="KPI snapshot history")
+    parser.add_argument('--store', default=CONFIG['SNAPSHOT_DIR'], help="Snapshot store directory")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs = commands.add_parser('runs', help="List stored runs of a KPI")
+    runs.add_argument('kpi')
+
+    series = commands.add_parser('series', help="KPI column across runs")
+    series.add_argument('kpi', help="e.g. regional_revenue")
+    series.add_argument('value', help="KPI column to trend, e.g. revenue")
+    series.add_argument('--by', help="Key column, one series per value (e.g. region)")
+    series.add_argument('--output', help="Write the series as CSV to this path")
+
+    for sub in (runs, series):
+        sub.add_argument('--start', help="First run date (YYYY-MM-DD)")
+        sub.add_argument('--end', help="Last run date (YYYY-MM-DD)")
+        sub.add_argument('--last', type=int, help="Only the most recent N runs")
+        sub.add_argument('--engine', choices=['inmemory', 'db'])
+
+    compact = commands.add_parser('compact', help="Merge partitions older than N days into one file each")
+    compact.add_argument('--older-than', type=int, default=CONFIG['SNAPSHOT_COMPACT_DAYS'], metavar='DAYS')
+    compact.add_argument('--dedupe', action='store_true',
+                         help="Keep only the first run per data version and engine in each compacted partition")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    pd.set_option('display.width', 120)
+    pd.set_option('display.max_columns', 20)
+
+    if args.command == 'runs':
+        filters = _filters(args)
+        last = filters.pop('last')
+        found = store.runs(args.kpi, start=filters['start'], end=filters['end'])
+        if args.engine:
+            found = found[found['engine'] == args.engine]
+        if last is not None:
+            found = found.tail(last)
+        print(found.to_string(index=False) if len(found) else f"No snapshots of '{args.kpi}' in {args.store}")
+    elif args.command == 'series':
+        result = store.series(args.kpi, args.value, by=args.by, **_filters(args))
+        if result.empty:
+            print(f"No snapshots of '{args.kpi}' in {args.store}")
+            return
+        print(result.to_string())
+        if args.output:
+            Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+            result.to_csv(args.output)
+            logger.info(f"Saved series: {args.output}")
+    else:
+        count = store.compact(older_than_days=args.older_than, dedupe=args.dedupe)
+        logger.info(f"Compacted {count} partitions")
+
+
+if __name__ == "__main__":
+    main()
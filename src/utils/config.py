@@ -24,6 +24,37 @@ CONFIG = {
     'ORDERS_XML': os.getenv('ORDERS_XML', str(RAW_DATA_DIR / 'task_DE_new_orders.xml')),
     'REPORTS_DIR': os.getenv('REPORTS_DIR', str(OUTPUT_DIR)),
     'TOP_N': int(os.getenv('TOP_N', '10')),
+    # Engine selection for run_auto_pipeline.py: auto, inmemory or db
+    'ENGINE': os.getenv('ENGINE', 'auto').lower(),
+    'ENGINE_COST_MODEL': os.getenv('ENGINE_COST_MODEL', str(PROCESSED_DATA_DIR / 'engine_costs.json')),
+    # Logging: background writer thread and log file rotation
+    'LOG_ASYNC': os.getenv('LOG_ASYNC', 'false').lower() in ('1', 'true', 'yes'),
+    'LOG_MAX_BYTES': int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+    'LOG_BACKUP_COUNT': int(os.getenv('LOG_BACKUP_COUNT', '5')),
+    'LOG_ROTATE_WHEN': os.getenv('LOG_ROTATE_WHEN', ''),
+    # Stage DAG execution
+    'PIPELINE_WORKERS': int(os.getenv('PIPELINE_WORKERS', '4')),
+    'CHECKPOINT_DIR': os.getenv('CHECKPOINT_DIR', str(PROCESSED_DATA_DIR / 'checkpoints')),
+    # Batched spend leaderboards: comma-separated window lengths (days) and timezones
+    'SPEND_WINDOWS': [int(d) for d in os.getenv('SPEND_WINDOWS', '7,30,90,365').split(',') if d.strip()],
+    'SPEND_TIMEZONES': [
+        tz.strip() for tz in os.getenv('SPEND_TIMEZONES', os.getenv('TZ', 'Asia/Kolkata')).split(',') if tz.strip()
+    ],
+    # Write rows dropped by validation to quarantine_<table>.csv
+    'QUARANTINE': os.getenv('QUARANTINE', 'false').lower() in ('1', 'true', 'yes'),
+    # Approximate KPI mode (sketch-based distinct counts, persisted and updated with new days)
+    'APPROX_KPIS': os.getenv('APPROX_KPIS', 'false').lower() in ('1', 'true', 'yes'),
+    'APPROX_DISTINCT_ERROR': float(os.getenv('APPROX_DISTINCT_ERROR', '0.02')),
+    'APPROX_SKETCH_DIR': os.getenv('APPROX_SKETCH_DIR', str(PROCESSED_DATA_DIR / 'sketches')),
+    # Exact KPI backend: 'pandas' or 'numpy' (sort-based kernels on integer codes)
+    'KPI_BACKEND': os.getenv('KPI_BACKEND', 'pandas').lower(),
+    # Answer KPIs from a precomputed region x month x customer cube
+    'KPI_CUBE': os.getenv('KPI_CUBE', 'false').lower() in ('1', 'true', 'yes'),
+    'CUBE_DIR': os.getenv('CUBE_DIR', str(PROCESSED_DATA_DIR / 'cubes')),
+    # Append every run's KPIs to the snapshot store; compact partitions older than N days
+    'SNAPSHOTS': os.getenv('SNAPSHOTS', 'true').lower() in ('1', 'true', 'yes'),
+    'SNAPSHOT_DIR': os.getenv('SNAPSHOT_DIR', str(PROCESSED_DATA_DIR / 'snapshots')),
+    'SNAPSHOT_COMPACT_DAYS': int(os.getenv('SNAPSHOT_COMPACT_DAYS', '7')),
 }
 
 # Database Configuration (for future use)
@@ -0,0 +1,229 @@
+"""
+Stage DAG Executor
+Runs pipeline stages as a dependency graph: independent stages run
+concurrently on a thread or process pool, stage outputs are checkpointed so
+a failed run resumes from the last good stage, and the critical path is
+reported in the run log
+"""
+import hashlib
+import logging
+import multiprocessing
+import pickle
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+log = logging.getLogger('akasa')
+
+
+def process_context():
+    """
+    Start method for process stages
+
+    Thread stages and the logging listener are already running when the
+    process pool starts, and forking a process with live threads can
+    deadlock the child, so workers come from a fork server (spawn where
+    that is unavailable).
+    """
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    return multiprocessing.get_context(method)
+
+
+class StageError(RuntimeError):
+    """Raised when a stage fails; carries the failing stage name"""
+
+    def __init__(self, stage, error):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class Stage:
+    """A named unit of work whose inputs are the outputs of its dependencies"""
+
+    def __init__(self, name, func, deps=(), executor='thread', checkpoint=True):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor '{executor}' for stage '{name}'")
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.executor = executor
+        self.checkpoint = checkpoint
+
+
+class StageDAG:
+    """
+    Dependency graph of pipeline stages
+
+    Each stage's function is called with its dependencies' outputs as
+    positional arguments, in the order the dependencies were declared.
+    Stages marked executor='process' must use picklable functions and
+    inputs (module-level functions or functools.partial of them).
+    """
+
+    def __init__(self, name, checkpoint_dir=None, fingerprint='', max_workers=4):
+        self.name = name
+        self.stages = {}
+        self.max_workers = max_workers
+        self.checkpoint_path = None
+        if checkpoint_dir:
+            key = hashlib.sha1(f"{name}|{fingerprint}".encode('utf-8')).hexdigest()[:12]
+            self.checkpoint_path = Path(checkpoint_dir) / f"{name}-{key}"
+        self.timings = {}
+
+    def add(self, name, func, deps=(), executor='thread', checkpoint=True):
+        """Register a stage; dependencies must already be registered"""
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage '{name}'")
+        unknown = [dep for dep in deps if dep not in self.stages]
+        if unknown:
+            raise ValueError(f"Stage '{name}' depends on unknown stages: {unknown}")
+        self.stages[name] = Stage(name, func, deps, executor, checkpoint)
+        return self
+
+    def has_checkpoints(self) -> bool:
+        """True if a previous failed run left resumable stage outputs"""
+        return bool(self.checkpoint_path and any(self.checkpoint_path.glob('*.pkl')))
+
+    def plan(self):
+        """
+        Decide which stages a run can avoid
+
+        A stage with a checkpoint is restored. A stage without one is skipped
+        when every stage that consumes it is restored or skipped itself, so
+        e.g. input loading is not repeated once its validated outputs are
+        checkpointed. Stages nothing depends on always run.
+
+        Returns:
+            (restored stage names, skipped stage names)
+        """
+        restored = {
+            name for name, stage in self.stages.items()
+            if self.checkpoint_path and stage.checkpoint and self._checkpoint_file(name).exists()
+        }
+        dependents = {name: [] for name in self.stages}
+        for name, stage in self.stages.items():
+            for dep in stage.deps:
+                dependents[dep].append(name)
+        skipped = set()
+        for name in reversed(list(self.stages)):  # dependents before their deps
+            if name in restored or not dependents[name]:
+                continue
+            if all(d in restored or d in skipped for d in dependents[name]):
+                skipped.add(name)
+        return restored, skipped
+
+    def _checkpoint_file(self, name):
+        return self.checkpoint_path / f"{name}.pkl"
+
+    def _load_checkpoint(self, stage):
+        if not (self.checkpoint_path and stage.checkpoint):
+            return False, None
+        path = self._checkpoint_file(stage.name)
+        if not path.exists():
+            return False, None
+        with open(path, 'rb') as f:
+            return True, pickle.load(f)
+
+    def _save_checkpoint(self, stage, output):
+        if not (self.checkpoint_path and stage.checkpoint):
+            return
+        self.checkpoint_path.mkdir(parents=True, exist_ok=True)
+        tmp = self._checkpoint_file(stage.name).with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(output, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp.replace(self._checkpoint_file(stage.name))
+
+    def run(self):
+        """
+        Execute all stages and return {stage_name: output}
+
+        Checkpoints are cleared after a fully successful run; after a failure
+        they are kept so the next run with the same fingerprint resumes (see
+        plan); skipped stages have no entry in the result.
+
+        Raises:
+            StageError: If any stage raises
+        """
+        outputs = {}
+        remaining = dict(self.stages)
+        running = {}
+        started = {}
+        pools = {'thread': ThreadPoolExecutor(self.max_workers)}
+        run_start = time.perf_counter()
+
+        restored, skipped = self.plan()
+        for name in skipped:
+            del remaining[name]
+            self.timings[name] = 0.0
+        if skipped:
+            log.info(f"[{self.name}] skipping {', '.join(sorted(skipped))}: consumers restored from checkpoints")
+
+        try:
+            while remaining or running:
+                for name, stage in list(remaining.items()):
+                    if name not in restored and not all(dep in outputs for dep in stage.deps):
+                        continue
+                    del remaining[name]
+                    resumed, output = self._load_checkpoint(stage) if name in restored else (False, None)
+                    if resumed:
+                        log.info(f"[{self.name}] {name}: resumed from checkpoint")
+                        outputs[name] = output
+                        self.timings[name] = 0.0
+                        continue
+                    if stage.executor not in pools:
+                        pools[stage.executor] = ProcessPoolExecutor(self.max_workers, mp_context=process_context())
+                    args = [outputs[dep] for dep in stage.deps]
+                    started[name] = time.perf_counter()
+                    running[pools[stage.executor].submit(stage.func, *args)] = stage
+
+                if not running:
+                    if remaining:
+                        # Checkpoint loads may have unblocked more stages
+                        continue
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        for pending in running:
+                            pending.cancel()
+                        raise StageError(stage.name, e) from e
+                    self.timings[stage.name] = time.perf_counter() - started[stage.name]
+                    log.info(f"[{self.name}] {stage.name}: done in {self.timings[stage.name]:.3f}s")
+                    outputs[stage.name] = output
+                    self._save_checkpoint(stage, output)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.perf_counter() - run_start
+        path, length = self.critical_path()
+        log.info(
+            f"[{self.name}] completed in {elapsed:.3f}s; critical path ({length:.3f}s): "
+            + " -> ".join(f"{name} ({self.timings[name]:.3f}s)" for name in path)
+        )
+        if self.checkpoint_path and self.checkpoint_path.exists():
+            shutil.rmtree(self.checkpoint_path, ignore_errors=True)
+        return outputs
+
+    def critical_path(self):
+        """Return (stage names, total seconds) of the longest timed dependency chain"""
+        finish = {}
+        parent = {}
+        for name, stage in self.stages.items():  # insertion order is topological
+            best = max(stage.deps, key=lambda dep: finish.get(dep, 0.0), default=None)
+            parent[name] = best
+            finish[name] = finish.get(best, 0.0) + self.timings.get(name, 0.0)
+        if not finish:
+            return [], 0.0
+        end = max(finish, key=finish.get)
+        path = []
+        while end is not None:
+            path.append(end)
+            end = parent[end]
+        return path[::-1], finish[path[0]]
@@ -0,0 +1,104 @@
+"""
+Grouping Kernels
+Sort-based NumPy aggregations on integer-coded keys: group sum/count,
+distinct count via sorted unique pairs, and a searchsorted join against
+a sorted key array
+"""
+import numpy as np
+import pandas as pd
+
+
+def encode(*columns):
+    """
+    Integer-code one or more key columns into a shared code space
+
+    Returns:
+        ([codes per column], uniques) where equal values get equal codes
+        across all columns and missing values get -1
+    """
+    first, uniques = pd.factorize(columns[0])
+    uniques = pd.Index(uniques)
+    codes = [first.astype('int64')]
+    for col in columns[1:]:
+        col = pd.Series(col)
+        pos = uniques.get_indexer(col)
+        new = col[(pos < 0) & col.notna().to_numpy()].unique()
+        if len(new):
+            uniques = uniques.append(pd.Index(new))
+            pos = uniques.get_indexer(col)
+        codes.append(pos.astype('int64'))
+    return codes, uniques
+
+
+def _group_bounds(sorted_keys: np.ndarray):
+    """Start offsets of each run of equal keys in a sorted array"""
+    if len(sorted_keys) == 0:
+        return np.zeros(0, dtype='int64')
+    return np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+
+
+def group_sum(keys: np.ndarray, values: np.ndarray):
+    """
+    Sum values per key
+
+    Returns:
+        (unique keys ascending, sums)
+    """
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    starts = _group_bounds(sorted_keys)
+    if len(starts) == 0:
+        return sorted_keys, np.zeros(0, dtype=np.result_type(values, 'float64'))
+    return sorted_keys[starts], np.add.reduceat(values[order], starts)
+
+
+def group_count(keys: np.ndarray):
+    """
+    Count rows per key
+
+    Returns:
+        (unique keys ascending, counts)
+    """
+    return _run_lengths(np.sort(keys))
+
+
+def _run_lengths(sorted_keys: np.ndarray):
+    starts = _group_bounds(sorted_keys)
+    return sorted_keys[starts], np.diff(np.r_[starts, len(sorted_keys)])
+
+
+def group_nunique(keys: np.ndarray, values: np.ndarray):
+    """
+    Count distinct non-negative value codes per key
+
+    (key, value) pairs are packed into one int64 and sorted; the first of
+    each run of equal pairs is kept and those are counted per key.
+
+    Returns:
+        (unique keys ascending, distinct counts)
+    """
+    valid = values >= 0
+    keys, values = keys[valid], values[valid]
+    if len(keys) == 0:
+        return keys, np.zeros(0, dtype='int64')
+    key_min = keys.min()
+    width = int(values.max()) + 1
+    pairs = np.sort((keys - key_min) * width + values)
+    pairs = pairs[_group_bounds(pairs)]
+    return _run_lengths(pairs // width + key_min)
+
+
+def sorted_join(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """
+    Left join of key codes against a key array
+
+    Returns:
+        Position in `right` of each `left` key, or -1 where it is absent
+        (the first position when `right` has duplicates)
+    """
+    if len(right) == 0:
+        return np.full(len(left), -1, dtype='int64')
+    order = np.argsort(right, kind='stable')
+    sorted_right = right[order]
+    pos = np.minimum(np.searchsorted(sorted_right, left, side='left'), len(right) - 1)
+    return np.where(sorted_right[pos] == left, order[pos], -1)
@@ -2,10 +2,167 @@
 Logging Configuration
 Sets up logging for the application
 """
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
 from pathlib import Path
 
-def setup_logger(name='akasa', log_file=None, level=logging.INFO):
+from utils.config import CONFIG
+
+# One background writer per destination (console only, or console + file)
+_listeners = {}
+_listeners_lock = threading.Lock()
+
+
+class _AsyncHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that hands records to a background writer thread
+
+    In a forked child process the writer thread doesn't exist, so records
+    are written synchronously there instead of being queued and lost.
+    Suppression counts from RateLimitFilter are appended to the prepared
+    copy, never to the caller's record.
+    """
+
+    def __init__(self, q, handlers):
+        super().__init__(q)
+        self._pid = os.getpid()
+        self._handlers = handlers
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        suppressed = getattr(record, 'suppressed_count', 0)
+        if suppressed:
+            record.msg = record.message = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return record
+
+    def emit(self, record):
+        if os.getpid() == self._pid:
+            super().emit(record)
+            return
+        record = self.prepare(record)
+        for handler in self._handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drop repeats of the same log call (logger, line, message template) beyond
+    `burst` records per `interval` seconds; the next record let through
+    carries how many were suppressed in its `suppressed_count` attribute
+    """
+
+    def __init__(self, interval=1.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self._windows = {}
+
+    def filter(self, record):
+        key = (record.name, record.lineno, record.msg if isinstance(record.msg, str) else id(record.msg))
+        now = time.monotonic()
+        start, count, suppressed = self._windows.get(key, (now, 0, 0))
+        if now - start >= self.interval:
+            start, count = now, 0
+        if count >= self.burst:
+            self._windows[key] = (start, count, suppressed + 1)
+            return False
+        record.suppressed_count = suppressed
+        self._windows[key] = (start, count + 1, 0)
+        return True
+
+
+class ThrottledLogger:
+    """
+    Cheap logging for hot loops
+
+    Each call is gated by a counter and clock check before any message
+    formatting happens; a key logs at most once per `interval` seconds
+    (and/or once every `every` calls), and the emitted line reports how
+    many calls were skipped. Arguments use %-style lazy formatting.
+    """
+
+    def __init__(self, logger, interval=1.0, every=0):
+        self.logger = logger
+        self.interval = interval
+        self.every = every
+        self._state = {}
+
+    def log(self, level, key, msg, *args):
+        last, calls, skipped = self._state.get(key, (float('-inf'), 0, 0))
+        calls += 1
+        now = time.monotonic()
+        due = (self.every and calls % self.every == 0) or (self.interval and now - last >= self.interval)
+        if not due or not self.logger.isEnabledFor(level):
+            self._state[key] = (last, calls, skipped + 1)
+            return
+        if skipped:
+            msg = f"{msg} (+{skipped} skipped)"
+        self.logger.log(level, msg, *args)
+        self._state[key] = (now, calls, 0)
+
+    def debug(self, key, msg, *args):
+        self.log(logging.DEBUG, key, msg, *args)
+
+    def info(self, key, msg, *args):
+        self.log(logging.INFO, key, msg, *args)
+
+    def warning(self, key, msg, *args):
+        self.log(logging.WARNING, key, msg, *args)
+
+
+def _file_handler(log_file, max_bytes, backup_count, rotate_when):
+    """Size- or time-rotating file handler"""
+    log_path = Path(log_file)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    if rotate_when:
+        return logging.handlers.TimedRotatingFileHandler(
+            log_path, when=rotate_when, backupCount=backup_count, encoding='utf-8'
+        )
+    if max_bytes:
+        return logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+        )
+    return logging.FileHandler(log_path, encoding='utf-8')
+
+
+def _async_handler(formatter, log_file, max_bytes, backup_count, rotate_when, rate_limit):
+    """Shared queue handler and background listener for one destination"""
+    key = (str(log_file) if log_file else None, max_bytes, backup_count, rotate_when)
+    with _listeners_lock:
+        if key not in _listeners:
+            targets = [logging.StreamHandler()]
+            if log_file:
+                targets.append(_file_handler(log_file, max_bytes, backup_count, rotate_when))
+            for target in targets:
+                target.setFormatter(formatter)
+
+            q = queue.SimpleQueue()
+            handler = _AsyncHandler(q, targets)
+            if rate_limit:
+                handler.addFilter(RateLimitFilter(*rate_limit))
+            listener = logging.handlers.QueueListener(q, *targets, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            _listeners[key] = handler
+        return _listeners[key]
+
+
+def setup_logger(
+    name='akasa',
+    log_file=None,
+    level=logging.INFO,
+    async_mode=None,
+    max_bytes=None,
+    backup_count=None,
+    rotate_when=None,
+    rate_limit=(1.0, 5)
+):
     """
     Setup logger with console and optional file handlers
     
@@ -13,6 +170,14 @@ def setup_logger(name='akasa', log_file=None, level=logging.INFO):
         name: Logger name
         log_file: Log file path (optional)
         level: Logging level
+        async_mode: Queue records to a background writer thread
+            (defaults to CONFIG['LOG_ASYNC'])
+        max_bytes: Rotate the log file at this size (defaults to CONFIG['LOG_MAX_BYTES'])
+        backup_count: Rotated files to keep (defaults to CONFIG['LOG_BACKUP_COUNT'])
+        rotate_when: Time-based rotation instead, e.g. 'midnight'
+            (defaults to CONFIG['LOG_ROTATE_WHEN'])
+        rate_limit: (interval seconds, burst) for repeated messages in async
+            mode, or None to disable
     
     Returns:
         Logger instance
@@ -24,12 +189,21 @@ def setup_logger(name='akasa', log_file=None, level=logging.INFO):
     if logger.handlers:
         return logger
     
+    async_mode = CONFIG['LOG_ASYNC'] if async_mode is None else async_mode
+    max_bytes = CONFIG['LOG_MAX_BYTES'] if max_bytes is None else max_bytes
+    backup_count = CONFIG['LOG_BACKUP_COUNT'] if backup_count is None else backup_count
+    rotate_when = CONFIG['LOG_ROTATE_WHEN'] if rotate_when is None else rotate_when
+    
     # Create formatter
     formatter = logging.Formatter(
         '%(asctime)s | %(levelname)s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
+    if async_mode:
+        logger.addHandler(_async_handler(formatter, log_file, max_bytes, backup_count, rotate_when, rate_limit))
+        return logger
+    
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
@@ -37,9 +211,7 @@ def setup_logger(name='akasa', log_file=None, level=logging.INFO):
     
     # File handler (if log_file provided)
     if log_file:
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        file_handler = logging.FileHandler(log_file)
+        file_handler = _file_handler(log_file, max_bytes, backup_count, rotate_when)
         file_handler.setFormatter(formatter)
         logger.addHandler(file_handler)
     
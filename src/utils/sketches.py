@@ -0,0 +1,413 @@
+"""
+Probabilistic Sketches
+Small, mergeable, bounded-memory summaries used for streaming profiling
+and approximate KPIs
+"""
+import heapq
+import itertools
+import math
+
+import numpy as np
+import pandas as pd
+
+
+class HyperLogLog:
+    """
+    HyperLogLog distinct-count estimator
+
+    Uses 2**precision one-byte registers; the relative standard error is
+    about 1.04 / sqrt(2**precision). Values are hashed with hash_series, a
+    whole chunk at a time. Sketches with the same precision merge by taking
+    the register-wise maximum.
+    """
+
+    def __init__(self, precision: int = 12):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    @classmethod
+    def from_error(cls, relative_error: float) -> 'HyperLogLog':
+        """Create a sketch with the smallest precision meeting relative_error"""
+        if relative_error <= 0:
+            raise ValueError("relative_error must be positive")
+        precision = math.ceil(math.log2((1.04 / relative_error) ** 2))
+        return cls(min(max(precision, 4), 18))
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate"""
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value):
+        self.update([value])
+
+    def update(self, values):
+        """Hash values with hash_series and add them"""
+        return self.update_hashes(hash_series(pd.Series(values, dtype=object)))
+
+    def update_hashes(self, hashes: np.ndarray) -> 'HyperLogLog':
+        """Add pre-hashed uint64 values"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        shift = 64 - self.precision
+        register = (hashes >> np.uint64(shift)).astype(np.int64)
+        rank = (shift - _bit_length(hashes & np.uint64((1 << shift) - 1)) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, register, rank)
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """Merge another sketch into this one in place"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / float(np.exp2(-self.registers.astype(np.float64)).sum())
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self) -> dict:
+        return {'precision': self.precision, 'registers': self.registers.tobytes().hex()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'HyperLogLog':
+        sketch = cls(data['precision'])
+        sketch.registers = np.frombuffer(bytes.fromhex(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+
+class SpaceSaving:
+    """
+    Space-Saving heavy-hitters sketch with optional weights
+
+    Keeps at most `capacity` counters. Each reported weight is within
+    total_weight / capacity of the true weight (streamed items can only be
+    overestimated; merged sketches may also undercount items pruned from one
+    side), so every item with a true share above that bound is present.
+    Evictions pop the smallest counter from a min-heap in O(log capacity).
+    """
+
+    def __init__(self, capacity: int = 100):
+        if capacity < 1:
+            raise ValueError("SpaceSaving capacity must be at least 1")
+        self.capacity = capacity
+        self.counters = {}
+        self.errors = {}
+        self.total = 0.0
+        # (weight, sequence, item); entries whose weight is outdated are skipped on pop
+        self._heap = []
+        self._sequence = itertools.count()
+
+    @classmethod
+    def from_error(cls, relative_error: float) -> 'SpaceSaving':
+        """Create a sketch whose error is at most relative_error * total"""
+        if relative_error <= 0:
+            raise ValueError("relative_error must be positive")
+        return cls(math.ceil(1 / relative_error))
+
+    @classmethod
+    def from_totals(cls, totals: pd.Series, capacity: int = 100) -> 'SpaceSaving':
+        """
+        Build a sketch from exact pre-aggregated weights (e.g. one chunk's
+        groupby sum); keeps the `capacity` heaviest items with zero error
+        """
+        sketch = cls(capacity)
+        sketch.total = float(totals.sum())
+        for item, weight in totals.nlargest(capacity).items():
+            sketch.counters[item] = float(weight)
+            sketch.errors[item] = 0.0
+        sketch._rebuild_heap()
+        return sketch
+
+    @property
+    def error_bound(self) -> float:
+        """Maximum absolute error of any reported weight"""
+        return self.total / self.capacity
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self.counters[item], next(self._sequence), item))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(weight, next(self._sequence), item) for item, weight in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            weight, _, item = heapq.heappop(self._heap)
+            if self.counters.get(item) == weight:
+                return item
+
+    def add(self, item, weight: float = 1):
+        self.total += weight
+        if item in self.counters:
+            self.counters[item] += weight
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = weight
+            self.errors[item] = 0
+        else:
+            victim = self._pop_min()
+            floor = self.counters.pop(victim)
+            self.errors.pop(victim)
+            self.counters[item] = floor + weight
+            self.errors[item] = floor
+        self._push(item)
+
+    def update(self, weights: pd.Series):
+        """Add a chunk's per-item weights (e.g. value_counts), in index order"""
+        for item, weight in zip(weights.index.tolist(), weights.tolist()):
+            self.add(item, weight)
+        return self
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Merge another sketch into this one in place"""
+        merged = dict(self.counters)
+        errors = dict(self.errors)
+        for item, weight in other.counters.items():
+            merged[item] = merged.get(item, 0) + weight
+            errors[item] = errors.get(item, 0) + other.errors[item]
+        keep = sorted(merged, key=merged.get, reverse=True)[:self.capacity]
+        self.counters = {item: merged[item] for item in keep}
+        self.errors = {item: errors[item] for item in keep}
+        self.total += other.total
+        self._rebuild_heap()
+        return self
+
+    def top(self, n: int = 10):
+        """Return [(item, estimated_weight, known_overestimate)] sorted by weight"""
+        items = sorted(self.counters.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return [(item, weight, self.errors[item]) for item, weight in items]
+
+    def to_dict(self) -> dict:
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'counters': [[item, weight, self.errors[item]] for item, weight in self.counters.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SpaceSaving':
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        for item, weight, error in data['counters']:
+            sketch.counters[item] = weight
+            sketch.errors[item] = error
+        sketch._rebuild_heap()
+        return sketch
+
+
+def hash_series(values: pd.Series) -> np.ndarray:
+    """Vectorized 64-bit hash of a Series' string form (pandas hash_array)"""
+    return pd.util.hash_array(values.astype('string').fillna('').to_numpy(dtype=object))
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Exact vectorized bit length of a uint64 array"""
+    v = x.astype(np.uint64, copy=True)
+    length = np.zeros(len(v), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = v >= (np.uint64(1) << np.uint64(shift))
+        v[big] >>= np.uint64(shift)
+        length[big] += shift
+    return length + (v > 0)
+
+
+class GroupedHyperLogLog:
+    """
+    Sparse HyperLogLog sketches for many groups at once
+
+    Registers are stored as a Series indexed by (group, register) holding
+    the maximum rank, so a group only costs one entry per non-empty register
+    and small groups (e.g. one customer's orders) stay tiny. Updates and
+    merges are vectorized; sketches merge when precision and hash match.
+    """
+
+    def __init__(self, precision: int = 12, hash_name: str = 'pandas'):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.hash_name = hash_name
+        self.registers = pd.Series(
+            [], dtype='int8',
+            index=pd.MultiIndex.from_arrays([[], []], names=['group', 'register'])
+        )
+
+    @classmethod
+    def from_error(cls, relative_error: float, hash_name: str = 'pandas') -> 'GroupedHyperLogLog':
+        """Create sketches with the smallest precision meeting relative_error"""
+        return cls(HyperLogLog.from_error(relative_error).precision, hash_name)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of each group's estimate"""
+        return 1.04 / math.sqrt(self.m)
+
+    def update_hashes(self, groups, hashes: np.ndarray) -> 'GroupedHyperLogLog':
+        """Add pre-hashed uint64 values, one per group label"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        shift = 64 - self.precision
+        register = (hashes >> np.uint64(shift)).astype(np.int64)
+        rest = hashes & np.uint64((1 << shift) - 1)
+        rank = (shift - _bit_length(rest) + 1).astype('int8')
+        return self.update_registers(pd.DataFrame({
+            'group': np.asarray(groups), 'register': register, 'rank': rank
+        }))
+
+    def update(self, groups, values: pd.Series) -> 'GroupedHyperLogLog':
+        """Hash values with hash_series and add them to their groups"""
+        if self.hash_name != 'pandas':
+            raise ValueError(f"Sketch uses '{self.hash_name}' hashes; add registers instead")
+        return self.update_hashes(groups, hash_series(values))
+
+    def update_registers(self, frame: pd.DataFrame) -> 'GroupedHyperLogLog':
+        """Fold a (group, register, rank) frame into the sketches"""
+        m = self.m
+        group_codes, labels = pd.factorize(np.asarray(frame['group'], dtype=object))
+        register = np.asarray(frame['register'], dtype='int64')
+        rank = np.asarray(frame['rank'], dtype='int8')
+        if self.registers.empty:
+            groups = pd.Index(labels, dtype=object)
+        else:
+            # Map incoming labels onto the existing groups, appending new ones
+            index = self.registers.index
+            groups = index.levels[0]
+            position = groups.get_indexer(labels)
+            missing = position < 0
+            position[missing] = len(groups) + np.arange(missing.sum())
+            groups = groups.append(pd.Index(labels[missing], dtype=object))
+            group_codes = position[group_codes]
+            existing = index.codes[0].astype('int64') * m + index.levels[1].to_numpy()[index.codes[1]]
+            register = np.concatenate([existing % m, register])
+            group_codes = np.concatenate([existing // m, group_codes])
+            rank = np.concatenate([self.registers.to_numpy(dtype='int8'), rank])
+        # One int64 key per (group, register) keeps the max-reduce off object labels
+        best = pd.Series(rank).groupby(group_codes.astype('int64') * m + register, sort=False).max()
+        keys = best.index.to_numpy()
+        self.registers = pd.Series(best.to_numpy(dtype='int8'), index=pd.MultiIndex(
+            levels=[groups, np.arange(m)], codes=[keys // m, keys % m],
+            names=['group', 'register'], verify_integrity=False
+        ))
+        return self
+
+    def merge(self, other: 'GroupedHyperLogLog') -> 'GroupedHyperLogLog':
+        """Merge another set of grouped sketches into this one in place"""
+        if (other.precision, other.hash_name) != (self.precision, self.hash_name):
+            raise ValueError("Cannot merge sketches with different precision or hash")
+        return self.update_registers(other.registers.reset_index(name='rank'))
+
+    def counts(self) -> pd.Series:
+        """Estimated distinct count per group"""
+        if self.registers.empty:
+            return pd.Series([], dtype='int64', name='estimate')
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m) if m >= 128 else {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        # Reduce straight on the group codes of the (group, register) index
+        index = self.registers.index.remove_unused_levels()
+        codes, groups = index.codes[0], index.levels[0]
+        filled = np.bincount(codes, minlength=len(groups))
+        inverse = np.exp2(-self.registers.to_numpy(dtype='float64'))
+        zeros = m - filled
+        raw = alpha * m * m / (zeros + np.bincount(codes, weights=inverse, minlength=len(groups)))
+        linear = m * np.log(m / np.maximum(zeros, 1))
+        estimate = np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw)
+        return pd.Series(np.round(estimate).astype('int64'), index=pd.Index(groups, name='group'), name='estimate')
+
+    def to_arrays(self) -> dict:
+        """Registers as NumPy arrays: distinct groups, group codes, register, rank"""
+        index = self.registers.index.remove_unused_levels()
+        return {
+            'groups': np.asarray(index.levels[0].astype(str), dtype=str),
+            'group_codes': np.asarray(index.codes[0], dtype='int32'),
+            'register': index.get_level_values('register').to_numpy(dtype='int32'),
+            'rank': self.registers.to_numpy(dtype='int8'),
+        }
+
+    @classmethod
+    def from_arrays(cls, precision: int, hash_name: str, arrays: dict) -> 'GroupedHyperLogLog':
+        sketch = cls(precision, hash_name)
+        if len(arrays['rank']):
+            # Rebuild the index from stored codes; registers already hold one max rank each
+            index = pd.MultiIndex(
+                levels=[pd.Index(arrays['groups'].astype(object)), np.arange(sketch.m)],
+                codes=[arrays['group_codes'], arrays['register']],
+                names=['group', 'register'], verify_integrity=False
+            )
+            sketch.registers = pd.Series(arrays['rank'].astype('int8'), index=index)
+        return sketch
+
+    def to_dict(self) -> dict:
+        frame = self.registers.reset_index(name='rank')
+        return {
+            'precision': self.precision,
+            'hash_name': self.hash_name,
+            'registers': frame.astype({'group': 'string'}).values.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GroupedHyperLogLog':
+        sketch = cls(data['precision'], data['hash_name'])
+        if data['registers']:
+            sketch.update_registers(
+                pd.DataFrame(data['registers'], columns=['group', 'register', 'rank'])
+            )
+        return sketch
+
+
+class ReservoirQuantiles:
+    """
+    Fixed-size uniform reservoir sample for approximate quantiles
+
+    Keeps at most `capacity` values regardless of stream length; also tracks
+    the exact minimum and maximum. Values are added a chunk at a time.
+    """
+
+    def __init__(self, capacity: int = 2048, seed: int = 0):
+        self.capacity = capacity
+        self.sample = np.empty(0, dtype=np.float64)
+        self.seen = 0
+        self.min = None
+        self.max = None
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, value: float):
+        self.update([value])
+
+    def update(self, values) -> 'ReservoirQuantiles':
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return self
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        fill = min(self.capacity - len(self.sample), len(values))
+        if fill > 0:
+            self.sample = np.concatenate([self.sample, values[:fill]])
+        rest = values[fill:]
+        if len(rest):
+            # Algorithm R: item number i (1-based) replaces a random slot with probability capacity / i
+            seen = self.seen + fill + np.arange(1, len(rest) + 1)
+            slots = self._rng.integers(0, seen)
+            keep = np.flatnonzero(slots < self.capacity)
+            # Later items overwrite earlier ones in the same slot, as if added one by one
+            _, last = np.unique(slots[keep][::-1], return_index=True)
+            keep = keep[len(keep) - 1 - last]
+            self.sample[slots[keep]] = rest[keep]
+        self.seen += len(values)
+        return self
+
+    def quantiles(self, qs=(0.25, 0.5, 0.75)) -> dict:
+        if not len(self.sample):
+            return {}
+        ordered = np.sort(self.sample)
+        last = len(ordered) - 1
+        return {q: float(ordered[min(last, int(round(q * last)))]) for q in qs}
@@ -0,0 +1,283 @@
+"""
+KPI Snapshot Store
+Append-only, columnar history of KPI outputs: every run writes one file
+per KPI under <root>/<kpi>/run_date=YYYY-MM-DD/, keyed by the input data
+version, and old partitions are compacted into a single file each.
+Queries prune by KPI, date partition and column, so trend questions are
+answered from stored snapshots without recomputing any KPI.
+"""
+import hashlib
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger('akasa')
+
+RUN_FIELDS = ('run_id', 'run_ts', 'data_version', 'engine')
+PARTITION_PREFIX = 'run_date='
+COMPACTED_PREFIX = 'compacted-'
+
+
+def data_version(fingerprint: str) -> str:
+    """Short stable key for an input fingerprint"""
+    return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+
+def _encode_column(s: pd.Series):
+    """(kind, values, na mask, extra meta) for one DataFrame column"""
+    na = s.isna().to_numpy(dtype=bool)
+    if isinstance(s.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(s.dtype):
+        tz = str(s.dt.tz) if s.dt.tz is not None else None
+        utc = s.dt.tz_convert('UTC').dt.tz_localize(None) if tz else s
+        return 'datetime', utc.astype('datetime64[ns]').to_numpy().astype('int64'), na, tz
+    if pd.api.types.is_bool_dtype(s.dtype) and not na.any():
+        return 'bool', s.to_numpy(dtype=bool), na, None
+    if pd.api.types.is_integer_dtype(s.dtype) and not na.any():
+        return 'int', s.to_numpy(dtype='int64'), na, None
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return 'float', s.to_numpy(dtype='float64', na_value=np.nan), na, None
+    return 'str', s.astype('string').fillna('').to_numpy(dtype=str), na, None
+
+
+def _decode_column(kind, values, na, tz):
+    if kind == 'datetime':
+        s = pd.Series(values.astype('datetime64[ns]'))
+        s[na] = pd.NaT
+        return s.dt.tz_localize('UTC').dt.tz_convert(tz) if tz else s
+    if kind == 'str':
+        s = pd.Series(pd.array(values, dtype='string'))
+        s[na] = pd.NA
+        return s
+    return pd.Series(values)
+
+
+def _write_snapshot(path: Path, frame: pd.DataFrame, runs: pd.DataFrame, run_index: np.ndarray):
+    """Write rows plus their run table atomically"""
+    arrays = {'_run': run_index.astype('int32')}
+    schema = []
+    for i, col in enumerate(frame.columns):
+        kind, values, na, tz = _encode_column(frame[col])
+        arrays[f"c{i}"], arrays[f"c{i}_na"] = values, na
+        schema.append({'name': str(col), 'kind': kind, 'tz': tz})
+    for field in RUN_FIELDS:
+        arrays[f"run_{field}"] = runs[field].astype(str).to_numpy(dtype=str)
+    arrays['schema'] = np.array(json.dumps(schema))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, 'wb') as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+
+
+def _read_runs(path: Path) -> pd.DataFrame:
+    """Run table of one snapshot file (cheap: reads only the run arrays)"""
+    with np.load(path) as data:
+        runs = pd.DataFrame({field: data[f"run_{field}"] for field in RUN_FIELDS})
+    runs['run_ts'] = pd.to_datetime(runs['run_ts'], utc=True)
+    return runs
+
+
+def _read_snapshot(path: Path, columns=None, run_ids=None) -> pd.DataFrame:
+    """Rows of one snapshot file with run metadata columns, optionally pruned"""
+    with np.load(path) as data:
+        schema = json.loads(str(data['schema']))
+        run_index = data['_run']
+        runs = pd.DataFrame({field: data[f"run_{field}"] for field in RUN_FIELDS})
+        keep = np.ones(len(run_index), dtype=bool)
+        if run_ids is not None:
+            keep = np.isin(runs['run_id'].to_numpy()[run_index], list(run_ids))
+        frame = pd.DataFrame({
+            col['name']: _decode_column(col['kind'], data[f"c{i}"][keep], data[f"c{i}_na"][keep], col['tz'])
+            for i, col in enumerate(schema)
+            if columns is None or col['name'] in columns
+        })
+        for field in RUN_FIELDS:
+            frame[field] = runs[field].to_numpy()[run_index[keep]]
+    frame['run_ts'] = pd.to_datetime(frame['run_ts'], utc=True)
+    return frame
+
+
+class SnapshotStore:
+    """Append-only KPI snapshot store rooted at a directory"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def kpis(self) -> list:
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    def partitions(self, kpi, start=None, end=None) -> list:
+        """(run_date, directory) pairs for a KPI, oldest first, within [start, end]"""
+        kpi_dir = self.root / kpi
+        if not kpi_dir.exists():
+            return []
+        start = pd.Timestamp(start).date() if start is not None else None
+        end = pd.Timestamp(end).date() if end is not None else None
+        parts = []
+        for path in kpi_dir.iterdir():
+            if not path.is_dir() or not path.name.startswith(PARTITION_PREFIX):
+                continue
+            day = pd.Timestamp(path.name[len(PARTITION_PREFIX):]).date()
+            if (start is None or day >= start) and (end is None or day <= end):
+                parts.append((day, path))
+        return sorted(parts)
+
+    @staticmethod
+    def _files(partition: Path) -> list:
+        return sorted(partition.glob('*.npz'))
+
+    def append(self, kpis: dict, version: str, engine='inmemory', run_ts=None) -> str:
+        """
+        Store one run's KPI frames
+
+        Args:
+            kpis: {kpi name: DataFrame}
+            version: Data version key of the run's inputs (see data_version)
+            engine: Engine that produced the KPIs
+
+        Returns:
+            run_id
+        """
+        run_ts = pd.Timestamp(run_ts if run_ts is not None else pd.Timestamp.now(tz='UTC'))
+        run_ts = run_ts.tz_localize('UTC') if run_ts.tzinfo is None else run_ts.tz_convert('UTC')
+        run_id = f"{run_ts.strftime('%Y%m%dT%H%M%S%fZ')}-{engine}-{version}"
+        runs = pd.DataFrame([{
+            'run_id': run_id, 'run_ts': run_ts.isoformat(), 'data_version': version, 'engine': engine,
+        }])
+        partition = f"{PARTITION_PREFIX}{run_ts.date().isoformat()}"
+        for kpi, frame in kpis.items():
+            frame = frame.reset_index(drop=True)
+            path = self.root / kpi / partition / f"{run_id}.npz"
+            _write_snapshot(path, frame, runs, np.zeros(len(frame), dtype='int32'))
+        log.info(f"Appended KPI snapshot {run_id} ({len(kpis)} KPIs) to {self.root}")
+        return run_id
+
+    def runs(self, kpi, start=None, end=None) -> pd.DataFrame:
+        """Stored runs of a KPI, oldest first"""
+        frames = [
+            _read_runs(path)
+            for _, partition in self.partitions(kpi, start, end)
+            for path in self._files(partition)
+        ]
+        if not frames:
+            return pd.DataFrame(columns=list(RUN_FIELDS))
+        return pd.concat(frames, ignore_index=True).sort_values('run_ts').reset_index(drop=True)
+
+    def read(self, kpi, start=None, end=None, last=None, version=None, engine=None, columns=None) -> pd.DataFrame:
+        """
+        Stored rows of a KPI across runs, with run_id/run_ts/data_version/engine columns
+
+        Args:
+            start, end: Inclusive run-date bounds (partition pruning)
+            last: Only the most recent `last` matching runs
+            version: Only runs on this data version
+            engine: Only runs of this engine
+            columns: Only these KPI columns
+        """
+        parts = self.partitions(kpi, start, end)
+        wanted = None
+        if last is not None or version is not None or engine is not None:
+            # Walk partitions newest first, reading only run tables
+            selected = []
+            for _, partition in reversed(parts):
+                for path in self._files(partition):
+                    runs = _read_runs(path)
+                    if version is not None:
+                        runs = runs[runs['data_version'] == version]
+                    if engine is not None:
+                        runs = runs[runs['engine'] == engine]
+                    selected.append(runs)
+                if last is not None and sum(len(r) for r in selected) >= last:
+                    break
+            runs = pd.concat(selected, ignore_index=True) if selected else pd.DataFrame(columns=list(RUN_FIELDS))
+            runs = runs.sort_values('run_ts')
+            if last is not None:
+                runs = runs.tail(last)
+            wanted = set(runs['run_id'])
+            if not wanted:
+                return pd.DataFrame(columns=list(RUN_FIELDS))
+            earliest = runs['run_ts'].min().date()
+            parts = [(day, partition) for day, partition in parts if day >= earliest]
+
+        frames = [
+            _read_snapshot(path, columns, wanted)
+            for _, partition in parts
+            for path in self._files(partition)
+        ]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.DataFrame(columns=list(RUN_FIELDS))
+        return pd.concat(frames, ignore_index=True).sort_values('run_ts', kind='stable').reset_index(drop=True)
+
+    def series(self, kpi, value, by=None, **filters) -> pd.DataFrame:
+        """
+        Time series of one KPI column across runs
+
+        Returns:
+            DataFrame indexed by run_ts with one column per `by` value
+            (or a single `value` column when `by` is None)
+        """
+        columns = [value] + ([by] if by else [])
+        rows = self.read(kpi, columns=columns, **filters)
+        if rows.empty:
+            return pd.DataFrame()
+        if by is None:
+            return rows.groupby('run_ts')[value].sum().to_frame()
+        return rows.pivot_table(index='run_ts', columns=by, values=value, aggfunc='sum')
+
+    def compact(self, older_than_days=7, dedupe=False, today=None) -> int:
+        """
+        Merge every partition older than `older_than_days` into one file
+
+        Args:
+            dedupe: Keep only the first run per (data_version, engine) in
+                each compacted partition; later runs on unchanged inputs
+                repeat the same KPIs
+
+        Returns:
+            Number of partitions compacted
+        """
+        today = pd.Timestamp(today).date() if today is not None else pd.Timestamp.now(tz='UTC').date()
+        cutoff = today - pd.Timedelta(days=older_than_days)
+        compacted = 0
+        for kpi in self.kpis():
+            for day, partition in self.partitions(kpi, end=cutoff - pd.Timedelta(days=1)):
+                files = self._files(partition)
+                if not files or (len(files) == 1 and not dedupe):
+                    continue
+                # Run tables come from the files, so runs with empty KPI frames survive
+                runs = pd.concat([_read_runs(path) for path in files], ignore_index=True)
+                runs = runs.sort_values('run_ts', kind='stable').reset_index(drop=True)
+                stored = len(runs)
+                if dedupe:
+                    runs = runs.drop_duplicates(['data_version', 'engine'], keep='first').reset_index(drop=True)
+                if len(files) == 1 and len(runs) == stored:
+                    continue
+                frame = pd.concat([_read_snapshot(path) for path in files], ignore_index=True)
+                frame = frame[frame['run_id'].isin(runs['run_id'])]
+                run_index = pd.Index(runs['run_id']).get_indexer(frame['run_id'])
+                runs = runs.assign(run_ts=runs['run_ts'].map(pd.Timestamp.isoformat))
+                target = partition / f"{COMPACTED_PREFIX}{uuid.uuid4().hex[:12]}.npz"
+                _write_snapshot(target, frame.drop(columns=list(RUN_FIELDS)).reset_index(drop=True), runs, run_index)
+                for path in files:
+                    path.unlink()
+                compacted += 1
+                log.info(f"Compacted {len(files)} snapshot files of {kpi} for {day} ({len(runs)} runs)")
+        return compacted
+
+
+def snapshot_run(kpis: dict, fingerprint: str, engine: str, root, compact_days=None) -> str:
+    """Append one pipeline run's KPIs and compact partitions older than compact_days"""
+    store = SnapshotStore(root)
+    run_id = store.append(kpis, data_version(fingerprint), engine=engine)
+    if compact_days is not None:
+        store.compact(older_than_days=compact_days)
+    return run_id
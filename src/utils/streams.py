@@ -0,0 +1,253 @@
+"""
+Input Streams
+Opens plain, gzip- or zstd-compressed input files as binary streams;
+compressed files are decompressed by a background thread into a bounded
+queue, so decompression overlaps with parsing and no uncompressed copy
+is written to disk
+"""
+import io
+import queue
+import threading
+import zlib
+from pathlib import Path
+
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+COMPRESSED_SUFFIXES = {'.gz': 'gzip', '.gzip': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+
+# Compressed bytes read per step, and decompressed chunks buffered ahead
+READ_SIZE = 1024 * 1024
+QUEUE_CHUNKS = 8
+
+# Compressed prefix decompressed by uncompressed_size to measure the ratio
+SAMPLE_BYTES = 1024 * 1024
+GZIP_ISIZE_WRAP = 1 << 32
+
+_DONE = object()
+
+
+def detect_compression(path):
+    """'gzip', 'zstd' or None, from the file's magic bytes"""
+    with open(path, 'rb') as f:
+        head = f.read(4)
+    if head.startswith(GZIP_MAGIC):
+        return 'gzip'
+    if head.startswith(ZSTD_MAGIC):
+        return 'zstd'
+    return None
+
+
+def strip_compression_suffix(path) -> str:
+    """File name without a trailing compression suffix (orders.xml.gz -> orders.xml)"""
+    path = Path(path)
+    return path.stem if path.suffix.lower() in COMPRESSED_SUFFIXES else path.name
+
+
+def _gzip_chunks(f):
+    """Decompress concatenated gzip members"""
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    in_member = False
+    while True:
+        data = f.read(READ_SIZE)
+        if not data:
+            break
+        while data:
+            in_member = True
+            out = decompressor.decompress(data)
+            if out:
+                yield out
+            if not decompressor.eof:
+                break
+            in_member = False
+            data = decompressor.unused_data.lstrip(b'\x00')
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    if in_member:
+        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+
+def _zstd_chunks(f):
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError("Reading .zst inputs requires the 'zstandard' package (pip install zstandard)") from e
+    reader = zstandard.ZstdDecompressor().stream_reader(f, read_size=READ_SIZE, read_across_frames=True)
+    while True:
+        out = reader.read(READ_SIZE)
+        if not out:
+            break
+        yield out
+
+
+_DECOMPRESSORS = {'gzip': _gzip_chunks, 'zstd': _zstd_chunks}
+
+
+class _ThreadedDecompressor(io.RawIOBase):
+    """Read-only raw stream fed by a decompression thread"""
+
+    def __init__(self, path, compression):
+        super().__init__()
+        self.name = str(path)
+        self._file = open(path, 'rb')
+        self._queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self._stop = threading.Event()
+        self._buffer = memoryview(b'')
+        self._eof = False
+        self._thread = threading.Thread(
+            target=self._run, args=(_DECOMPRESSORS[compression],),
+            name=f"decompress-{Path(path).name}", daemon=True
+        )
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, chunks):
+        try:
+            for chunk in chunks(self._file):
+                if not self._put(chunk):
+                    return
+            self._put(_DONE)
+        except BaseException as e:
+            self._put(e)
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer and not self._eof:
+            item = self._queue.get()
+            if item is _DONE:
+                self._eof = True
+            elif isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            else:
+                self._buffer = memoryview(item)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._file.close()
+        super().close()
+
+
+def open_input(path, buffer_size=io.DEFAULT_BUFFER_SIZE):
+    """
+    Open an input file for binary reading, decompressing gzip/zstd on the fly
+
+    Compression is detected from the file's magic bytes, so renamed files
+    work too. Use as a context manager; pandas readers, csv (through
+    io.TextIOWrapper) and ElementTree.iterparse all accept the result.
+    """
+    compression = detect_compression(path)
+    if compression is None:
+        return open(path, 'rb', buffering=buffer_size)
+    return io.BufferedReader(_ThreadedDecompressor(path, compression), buffer_size=max(buffer_size, READ_SIZE))
+
+
+def open_text_input(path, encoding='utf-8'):
+    """Text-mode open_input for line-oriented readers such as csv"""
+    return io.TextIOWrapper(open_input(path), encoding=encoding, newline='')
+
+
+def _sample_gzip(data: bytes):
+    """(decompressed bytes, compressed bytes consumed, gzip members completed) of a prefix"""
+    out = members = 0
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    rest = data
+    try:
+        while rest:
+            out += len(decompressor.decompress(rest, READ_SIZE))
+            rest = decompressor.unconsumed_tail
+            if decompressor.eof:
+                members += 1
+                rest = decompressor.unused_data.lstrip(b'\x00')
+                decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    except zlib.error:
+        pass
+    return out, len(data) - len(rest), members
+
+
+def _sample_zstd(data: bytes):
+    """(decompressed bytes, compressed bytes consumed) of a prefix"""
+    import zstandard
+    out = 0
+    source = io.BytesIO(data)
+    reader = zstandard.ZstdDecompressor().stream_reader(source, read_size=READ_SIZE, read_across_frames=True)
+    try:
+        while True:
+            chunk = reader.read(READ_SIZE)
+            if not chunk:
+                break
+            out += len(chunk)
+    except zstandard.ZstdError:
+        pass
+    return out, source.tell()
+
+
+def uncompressed_size(path) -> int:
+    """
+    Best-effort size of the decompressed content in bytes
+
+    The header fields are unreliable on their own: the gzip ISIZE trailer
+    is the last member's size modulo 4 GiB, and the zstd header only sizes
+    the first frame. So a compressed prefix of SAMPLE_BYTES is decompressed
+    and its ratio scales the file size. A single-member gzip's ISIZE is
+    still used to make that estimate exact, by picking the ISIZE + k * 4 GiB
+    closest to it. Files no larger than the sample are measured exactly.
+    Falls back to the on-disk size when the format is unknown.
+    """
+    size = Path(path).stat().st_size
+    compression = detect_compression(path)
+    if compression is None:
+        return size
+    with open(path, 'rb') as f:
+        data = f.read(SAMPLE_BYTES)
+    try:
+        if compression == 'gzip':
+            out, consumed, members = _sample_gzip(data)
+        else:
+            out, consumed = _sample_zstd(data)
+            members = 0
+    except ImportError:
+        return size
+    if size <= SAMPLE_BYTES:
+        return out or size
+    if not consumed:
+        return size
+    estimate = int(out / consumed * size)
+
+    if compression == 'gzip' and members == 0:
+        with open(path, 'rb') as f:
+            f.seek(-4, io.SEEK_END)
+            isize = int.from_bytes(f.read(4), 'little')
+        wraps = max(round((estimate - isize) / GZIP_ISIZE_WRAP), 0)
+        candidate = isize + wraps * GZIP_ISIZE_WRAP
+        # An empty trailing member or a wrapped field reads smaller than the input
+        if candidate >= size:
+            return candidate
+    return max(estimate, size)
+
+
+def input_fingerprint(*paths) -> str:
+    """Identify the input data version by path, size and mtime"""
+    parts = []
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(str(path))
+    return "|".join(parts)